@@ -0,0 +1,83 @@
+"""Compact, append-only log of every answered question, for item analysis.
+
+Each answer is one fixed-size little-endian record (see ``ANSWER_RECORD``)
+behind a short file header, so the log can be memory-mapped straight into a
+NumPy structured array (``ANSWER_DTYPE``) without parsing. Records are queued
+by the handler and appended in batches by a background writer under an
+exclusive file lock, like the results CSV.
+
+Question ids are stored as their 16 UUID bytes (ids that are not UUIDs are
+hashed to 16 bytes); sessions as an 8-byte hash of the session token, so the
+log cannot be joined back to a person.
+"""
+import hashlib
+import os
+import struct
+import time
+import uuid
+
+import numpy as np
+
+from results_sink import BatchSink, fcntl
+
+ANSWER_LOG_MAGIC = b'QANS0001'
+# timestamp, question key, session key, response ms, chosen index (-1: none),
+# correct (0/1), AI model code, position in the quiz
+ANSWER_RECORD = struct.Struct('<d16s8sIbbBB')
+ANSWER_DTYPE = np.dtype([('timestamp', '<f8'), ('question', 'V16'), ('session', '<u8'), ('response_ms', '<u4'),
+                         ('chosen', 'i1'), ('correct', 'i1'), ('model', 'u1'), ('position', 'u1')])
+# Model codes are part of the file format: append new models, never reorder.
+ANSWER_MODELS = ('gpt-5', 'gpt-4.1', 'gpt-4.1-nano')
+UNKNOWN_MODEL = 255
+
+
+def question_key(question_id):
+    try:
+        return uuid.UUID(question_id).bytes
+    except (ValueError, TypeError, AttributeError):
+        return hashlib.blake2b(str(question_id).encode('utf-8'), digest_size=16).digest()
+
+
+def session_key(session_token):
+    return hashlib.blake2b(session_token.encode('utf-8'), digest_size=8).digest()
+
+
+def model_code(ai_model):
+    try:
+        return ANSWER_MODELS.index(ai_model)
+    except ValueError:
+        return UNKNOWN_MODEL
+
+
+class AnswerLogSink(BatchSink):
+    """Batched appends of ``ANSWER_RECORD`` rows to a binary answer log."""
+
+    def __init__(self, path, **kwargs):
+        self.path = path
+        super().__init__(name="answer-log", **kwargs)
+
+    def log(self, session_token, question_id, chosen, correct, ai_model, response_seconds, position):
+        # Keys are hashed and records packed on the writer thread, off the request path.
+        self.submit((time.time(), question_id, session_token, response_seconds, chosen, correct, ai_model, position))
+
+    def _write_batch(self, records):
+        payload = b''.join(
+            ANSWER_RECORD.pack(timestamp, question_key(question_id), session_key(session_token),
+                               min(max(int(response_seconds * 1000), 0), 0xFFFFFFFF), chosen,
+                               1 if correct else 0, model_code(ai_model), position)
+            for timestamp, question_id, session_token, response_seconds, chosen, correct, ai_model, position in records)
+        with open(self.path, 'ab') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                size = f.seek(0, os.SEEK_END)
+                if size == 0:
+                    f.write(ANSWER_LOG_MAGIC)
+                elif (size - len(ANSWER_LOG_MAGIC)) % ANSWER_RECORD.size:
+                    # Drop a torn record (e.g. from a full disk) so later records stay aligned.
+                    os.ftruncate(f.fileno(), size - (size - len(ANSWER_LOG_MAGIC)) % ANSWER_RECORD.size)
+                f.write(payload)
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
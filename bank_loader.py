@@ -0,0 +1,86 @@
+"""Hot reload for the question bank.
+
+``BankLoader`` owns the current ``QuestionBank`` for one JSONL file. ``refresh``
+parses only the lines appended since the last load (or reloads from scratch if
+the file was replaced or truncated), appends them to the memory-mapped cache and
+publishes the result as a brand-new bank object, so anything still holding the
+previous bank -- e.g. a quiz in progress -- keeps a consistent snapshot.
+``watch`` polls the file in the background and refreshes on change.
+"""
+import os
+import threading
+import time
+
+from question_bank import QuestionBank, extend_bank, load_bank
+
+
+class BankLoader:
+    def __init__(self, path, on_swap=None):
+        self.path = path
+        self.on_swap = on_swap
+        self.bank = QuestionBank.from_records([])
+        self.reloads = 0
+        self.last_load_seconds = 0.0
+        self.rejected = 0
+        self._identity = None  # (st_dev, st_ino) of the file the bank was read from
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def load(self):
+        """Full load (through the binary cache); returns the new bank."""
+        with self._lock:
+            return self._load_locked(time.perf_counter())
+
+    def _load_locked(self, start):
+        try:
+            st = os.stat(self.path)
+            bank = load_bank(self.path)
+        except (FileNotFoundError, ValueError, KeyError) as e:
+            print(f"Error loading questions: {e}")
+            return self.bank
+        self._identity = (st.st_dev, st.st_ino)
+        return self._publish(bank, start)
+
+    def refresh(self):
+        """Pick up changes to the file: append new lines, or reload fully if it was replaced."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self.bank
+        if (st.st_dev, st.st_ino) != self._identity or st.st_size < self.bank.source_bytes:
+            return self.load()
+        if st.st_size == self.bank.source_bytes:
+            return self.bank
+        with self._lock:
+            start = time.perf_counter()
+            base = self.bank
+            if not base:
+                return self._load_locked(start)
+            bank, accepted, rejected = extend_bank(base, self.path)
+            self.rejected += rejected
+            if bank is None or bank is base:
+                return base
+            print(f"Question bank: +{accepted} questions ({len(bank)} total) from {self.path}.")
+            return self._publish(bank, start)
+
+    def _publish(self, bank, start):
+        self.last_load_seconds = time.perf_counter() - start
+        self.reloads += 1
+        self.bank = bank
+        if self.on_swap is not None:
+            self.on_swap(bank)
+        return bank
+
+    def watch(self, interval=5.0):
+        """Poll for changes every ``interval`` seconds in a daemon thread."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:  # keep watching; the current bank stays live
+                    print(f"Error reloading questions: {e}")
+
+        threading.Thread(target=run, name="bank-watcher", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,210 @@
+"""Headless load test for start_quiz / process_answer.
+
+Direct mode (default) imports the app and drives the handlers from a thread
+pool, one full quiz (start + 10 answers) per simulated session. Client mode
+(--url) drives a running app through gradio_client instead.
+
+    python benchmark_quiz.py --sessions 500 --concurrency 40
+    python benchmark_quiz.py --url http://127.0.0.1:7860 --sessions 50 --concurrency 10
+    python benchmark_quiz.py --save-baseline      # record benchmark_baseline.json
+    python benchmark_quiz.py --check              # exit 1 if slower than baseline * tolerance
+
+Direct mode writes results, answer telemetry and the participant registry to
+temporary files, never to the real ones; in client mode start the app with
+QUIZ_RESULTS_PATH, QUIZ_ANSWERS_PATH and QUIZ_REGISTRY_PATH pointing somewhere
+disposable.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+# Metrics compared against the baseline and whether bigger is better.
+CHECKED_METRICS = {
+    "start_quiz.p95_ms": False,
+    "process_answer.p95_ms": False,
+    "save_results_to_csv.p95_ms": False,
+    "sessions_per_sec": True,
+}
+
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return {"count": len(samples), "p50_ms": round(cuts[49], 3), "p95_ms": round(cuts[94], 3),
+            "p99_ms": round(cuts[98], 3), "max_ms": round(max(samples), 3)}
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+class Timings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, name, elapsed_ms):
+        with self._lock:
+            self.samples.setdefault(name, []).append(elapsed_ms)
+
+    def timed(self, name, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+
+def run_direct(args, timings):
+    os.environ["QUIZ_RESULTS_PATH"] = args.results_path
+    os.environ["QUIZ_ANSWERS_PATH"] = args.answers_path
+    os.environ["QUIZ_REGISTRY_PATH"] = args.registry_path
+    warnings.filterwarnings("ignore")
+    import demo_merchandise as app
+
+    # Time the results hand-off on its own so write-path contention is visible.
+    original_save = app.save_results_to_csv
+    app.save_results_to_csv = lambda *a: timings.timed("save_results_to_csv", original_save, *a)
+    buttons = [app.choice_a_button, app.choice_b_button, app.choice_c_button, app.choice_d_button]
+    models = ["gpt-4.1-nano", "gpt-4.1", "gpt-5"]
+    max_depth = [0]
+    stop = threading.Event()
+
+    def watch_queue():
+        while not stop.wait(0.005):
+            max_depth[0] = max(max_depth[0], app.results_sink.stats()["queue_depth"])
+
+    def one_session(i):
+        rng = random.Random(i)
+        out = timings.timed("start_quiz", app.start_quiz, f"Bench User {i}", f"bench{i}@example.com",
+                            "Bench Co", "Tester", rng.choice(models), True)
+        token = out[app.session_state]
+        labels = [out[b]["value"] for b in buttons]
+        for _ in range(app.NUM_QUESTIONS):
+            out = timings.timed("process_answer", app.process_answer, rng.choice(labels), token)
+            if app.choice_a_button in out and "value" in out[app.choice_a_button]:
+                labels = [out[b]["value"] for b in buttons]
+
+    rss_before = peak_rss_mb()
+    watcher = threading.Thread(target=watch_queue, daemon=True)
+    watcher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_session, range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    flush_start = time.perf_counter()
+    app.results_sink.flush()
+    drain_ms = (time.perf_counter() - flush_start) * 1000
+    stop.set()
+    app.answer_log.close()  # before the temporary directory goes away
+    app.participant_registry.close()
+    sink = app.results_sink.stats()
+    sink.update(max_queue_depth=max_depth[0], drain_after_run_ms=round(drain_ms, 3))
+    rss_per_session_kb = max(peak_rss_mb() - rss_before, 0) * 1024 / max(min(args.concurrency, args.sessions), 1)
+    return elapsed, sink, rss_per_session_kb
+
+
+def run_client(args, timings):
+    from gradio_client import Client
+
+    models = ["gpt-4.1-nano", "gpt-4.1", "gpt-5"]
+    answer_endpoints = ["/process_answer", "/process_answer_1", "/process_answer_2", "/process_answer_3"]
+
+    def one_session(i):
+        rng = random.Random(i)
+        client = Client(args.url, verbose=False)
+        timings.timed("start_quiz", lambda: client.predict(f"Bench User {i}", f"bench{i}@example.com", "Bench Co",
+                                                           "Tester", rng.choice(models), True, api_name="/start_quiz"))
+        # Button labels are not exposed over the API, so answers are scored as N/A; latency is unaffected.
+        for _ in range(10):
+            timings.timed("process_answer", lambda: client.predict("", api_name=rng.choice(answer_endpoints)))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_session, range(args.sessions)))
+    return time.perf_counter() - start, None, None
+
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for metric, higher_is_better in CHECKED_METRICS.items():
+        current, expected = lookup(report, metric), lookup(baseline, metric)
+        if current is None or not expected:
+            continue
+        if (current < expected / tolerance) if higher_is_better else (current > expected * tolerance):
+            regressions.append(f"{metric}: {current} vs baseline {expected} (tolerance x{tolerance})")
+    return regressions
+
+
+def lookup(report, dotted):
+    value = report
+    for key in dotted.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=40, help="simultaneous sessions (Gradio's default thread pool is 40)")
+    parser.add_argument("--url", help="benchmark a running app through gradio_client instead of calling handlers directly")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail if results regress past the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=2.0)
+    args = parser.parse_args()
+
+    timings = Timings()
+    with tempfile.TemporaryDirectory() as tmp:
+        args.results_path = os.path.join(tmp, "quiz_results.csv")
+        args.answers_path = os.path.join(tmp, "quiz_answers.bin")
+        args.registry_path = os.path.join(tmp, "quiz_participants.db")
+        runner = run_client if args.url else run_direct
+        elapsed, sink, rss_per_session_kb = runner(args, timings)
+
+    report = {"mode": "client" if args.url else "direct", "sessions": args.sessions,
+              "concurrency": args.concurrency, "elapsed_s": round(elapsed, 3),
+              "sessions_per_sec": round(args.sessions / elapsed, 2),
+              "calls_per_sec": round(sum(len(s) for s in timings.samples.values()) / elapsed, 2),
+              "peak_rss_mb": round(peak_rss_mb(), 1)}
+    if rss_per_session_kb is not None:
+        report["rss_per_session_kb"] = round(rss_per_session_kb, 1)
+    for name, samples in sorted(timings.samples.items()):
+        report[name] = percentiles(samples)
+    if sink is not None:
+        report["results_sink"] = sink
+
+    print(json.dumps(report, indent=2))
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {BASELINE_PATH}", file=sys.stderr)
+    if args.check:
+        try:
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            sys.exit(f"No baseline at {BASELINE_PATH}; run with --save-baseline first.")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
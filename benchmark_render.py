@@ -0,0 +1,94 @@
+"""Micro-benchmark: per-click HTML rendering, f-strings vs the quiz_render caches.
+
+"fstring" is the rendering process_answer used to do on every click: progress
+bar, question card, both score cards and the feedback text built from scratch.
+"fstring_escaped" is the same with the question text escaped, as it should have
+been. "cached" picks the same fragments from quiz_render. All walk the same
+simulated clicks over a real bank; times are CPU time per click.
+
+    python benchmark_render.py
+    python benchmark_render.py --bank test_bank_200.jsonl --clicks 200000
+"""
+import argparse
+import html
+import json
+import os
+import random
+import time
+
+from question_bank import NO_ANSWER, load_bank
+from quiz_render import CHOICES, answer_feedback, progress_bars, question_cards, score_card
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def render_fstring(bank, row, position, total, user_score, ai_score, user_choice, ai_answer, correct, escape=False):
+    percentage = (position / total) * 100
+    title = f'''
+            <div class="progress-container">
+                <div class="progress-bar-fill" style="width: {percentage}%;"></div>
+                <div class="progress-text">Question {position} / {total}</div>
+            </div>
+        '''
+    text = bank.question(row)
+    card = f'<div id="question-card"><span>{html.escape(text) if escape else text}</span></div>'
+    user_html = f'<div class="score-card" id="user-score-card">Human<br><span class="score-value">{user_score}</span></div>'
+    ai_html = f'<div class="score-card" id="ai-score-card">AI<br><span class="score-value">{ai_score}</span></div>'
+    feedback = (f"Your answer: **{CHOICES[user_choice] if user_choice != -1 else 'N/A'}** ({'✅ Correct' if user_choice == correct else '❌ Incorrect'}).\n"
+                f"AI's answer: **{CHOICES[ai_answer] if ai_answer != NO_ANSWER else 'N/A'}** ({'✅ Correct' if ai_answer == correct else '❌ Incorrect'}).\n"
+                f"The correct answer was: **{CHOICES[correct]}**.")
+    return title, card, user_html, ai_html, feedback
+
+
+def render_fstring_escaped(bank, *click):
+    return render_fstring(bank, *click, escape=True)
+
+
+def render_cached(bank, row, position, total, user_score, ai_score, user_choice, ai_answer, correct):
+    return (progress_bars(total)[position - 1], question_cards(bank)[row], score_card('user', user_score),
+            score_card('ai', ai_score), answer_feedback(user_choice, ai_answer, correct))
+
+
+def simulated_clicks(bank, count, total, seed=0):
+    rng = random.Random(seed)
+    model = bank.models[0] if bank.models else None
+    clicks = []
+    for i in range(count):
+        row = rng.randrange(len(bank))
+        position = i % total + 1
+        clicks.append((row, position, total, rng.randint(0, position - 1), rng.randint(0, position - 1),
+                       rng.randint(-1, 3), bank.answer(row, model), bank.correct[row]))
+    return clicks
+
+
+def cpu_per_click_us(render, bank, clicks):
+    start = time.process_time()
+    for click in clicks:
+        render(bank, *click)
+    return (time.process_time() - start) / len(clicks) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bank", default=os.path.join(HERE, "test_bank_200.jsonl"))
+    parser.add_argument("--clicks", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bank = load_bank(args.bank)
+    start = time.perf_counter()
+    question_cards(bank)
+    prerender_ms = (time.perf_counter() - start) * 1000
+    clicks = simulated_clicks(bank, args.clicks, args.questions)
+    fstring = min(cpu_per_click_us(render_fstring, bank, clicks) for _ in range(args.repeat))
+    escaped = min(cpu_per_click_us(render_fstring_escaped, bank, clicks) for _ in range(args.repeat))
+    cached = min(cpu_per_click_us(render_cached, bank, clicks) for _ in range(args.repeat))
+    print(json.dumps({"questions_in_bank": len(bank), "clicks": args.clicks, "prerender_ms": round(prerender_ms, 2),
+                      "fstring_us_per_click": round(fstring, 3), "fstring_escaped_us_per_click": round(escaped, 3),
+                      "cached_us_per_click": round(cached, 3), "speedup": round(fstring / cached, 2),
+                      "speedup_vs_escaped": round(escaped / cached, 2)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
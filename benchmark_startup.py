@@ -0,0 +1,106 @@
+"""Cold-start benchmark: import-to-ready time and question bank load time.
+
+Every measurement runs in a fresh interpreter. "cold" deletes the binary bank
+cache first (JSONL parse + cache write); "warm" reuses it (memory-mapped load).
+A synthetic bank of --synthetic-size questions is generated from the 200-question
+file with fresh ids.
+
+--compare-pandas times the old pd.read_json load, import included. The app
+itself still imports pandas, because ``import gradio`` does; what the binary
+cache saves there is the parse, not the import.
+
+    python benchmark_startup.py
+    python benchmark_startup.py --synthetic-size 100000 --repeat 5 --compare-pandas
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE_BANK = os.path.join(HERE, "test_bank_200.jsonl")
+
+IMPORT_SCRIPT = """
+import time, warnings
+start = time.perf_counter()
+warnings.filterwarnings("ignore")
+import demo_merchandise
+print(time.perf_counter() - start, len(demo_merchandise.full_question_bank))
+"""
+BANK_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from question_bank import load_bank
+bank = load_bank(sys.argv[1])
+print(time.perf_counter() - start, len(bank))
+"""
+PANDAS_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import pandas as pd
+records = pd.read_json(sys.argv[1], lines=True).to_dict(orient='records')
+print(time.perf_counter() - start, len(records))
+"""
+
+
+def write_synthetic_bank(path, size):
+    with open(SOURCE_BANK, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(size):
+            record = records[i % len(records)]
+            f.write(json.dumps(dict(record, id=f"{record['id']}-{i // len(records)}")) + "\n")
+
+
+def run(script, bank_path, env):
+    out = subprocess.run([sys.executable, "-c", script, bank_path], cwd=HERE, env=env,
+                         capture_output=True, text=True, check=True)
+    seconds, count = out.stdout.split()[-2:]
+    return float(seconds), int(count)
+
+
+def measure(script, bank_path, env, repeat, cold):
+    timings = []
+    for _ in range(repeat):
+        if cold and os.path.exists(bank_path + ".qbank"):
+            os.remove(bank_path + ".qbank")
+        seconds, count = run(script, bank_path, env)
+        timings.append(seconds)
+    return {"questions": count, "median_s": round(statistics.median(timings), 4), "min_s": round(min(timings), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic-size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare-pandas", action="store_true", help="also time the old pd.read_json load")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        small = os.path.join(tmp, "test_bank_200.jsonl")
+        with open(SOURCE_BANK, "rb") as src, open(small, "wb") as dst:
+            dst.write(src.read())
+        large = os.path.join(tmp, f"synthetic_{args.synthetic_size}.jsonl")
+        write_synthetic_bank(large, args.synthetic_size)
+        env = dict(os.environ, QUIZ_RESULTS_PATH=os.path.join(tmp, "quiz_results.csv"), QUIZ_METRICS_PORT="0",
+                   QUIZ_REGISTRY_PATH=os.path.join(tmp, "quiz_participants.db"))
+
+        for label, path in (("bank_200", small), (f"bank_{args.synthetic_size}", large)):
+            env["QUIZ_FILE_PATH"] = path
+            report[label] = {
+                "bank_load_cold": measure(BANK_SCRIPT, path, env, args.repeat, cold=True),
+                "bank_load_warm": measure(BANK_SCRIPT, path, env, args.repeat, cold=False),
+                "import_to_ready_cold": measure(IMPORT_SCRIPT, path, env, args.repeat, cold=True),
+                "import_to_ready_warm": measure(IMPORT_SCRIPT, path, env, args.repeat, cold=False),
+            }
+            if args.compare_pandas:
+                report[label]["pandas_read_json"] = measure(PANDAS_SCRIPT, path, env, args.repeat, cold=False)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
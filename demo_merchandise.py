@@ -1,10 +1,20 @@
 import gradio as gr
-import pandas as pd
-import random
 import os
-import base64
 import re
+import atexit
+import time
 from datetime import datetime
+from results_sink import CsvResultsSink
+from answer_log import AnswerLogSink
+from session_store import SessionStore, SqliteSessionStore
+from bank_loader import BankLoader
+from quiz_sampler import QuizSampler
+from static_assets import AssetStore
+from metrics import Metrics, SamplingProfiler
+from leaderboard import LeaderboardStats
+from participant_registry import ParticipantRegistry
+from quiz_render import answer_feedback, progress_bars, question_cards, result_banner, score_card
+from quiz_pack import PACK_ANSWER_JS, PACK_STAMP_JS, build_pack, parse_submission, score_submission
 
 # --- Constants & Configuration ---
 # --- Constants & Configuration ---
@@ -13,9 +23,25 @@ BANNER_IMAGE_PATH = "/home/bigdata/health_care_week/hcw_banner.png"
 ### --- MODIFIED --- ###
 # Corrected the file path to use forward slashes.
 WELCOME_BANNER_PATH = "/home/bigdata/health_care_week/prize_banner.png"
-QUIZ_FILE_PATH = "/home/bigdata/health_care_week/test_bank_200.jsonl"
-CHOICES = ["A", "B", "C", "D"]
+QUIZ_FILE_PATH = os.environ.get("QUIZ_FILE_PATH", "/home/bigdata/health_care_week/test_bank_200.jsonl")
+RESULTS_FILE_PATH = os.environ.get("QUIZ_RESULTS_PATH", "quiz_results.csv")
+ANSWERS_FILE_PATH = os.environ.get("QUIZ_ANSWERS_PATH", "quiz_answers.bin")  # per-answer log for item_analysis.py
+ASSET_CACHE_DIR = "/home/bigdata/health_care_week/.asset_cache"
+METRICS_PORT = int(os.environ.get("QUIZ_METRICS_PORT", "9464"))  # localhost only; 0 disables
+BANK_RELOAD_SECONDS = float(os.environ.get("QUIZ_BANK_RELOAD_SECONDS", "5"))  # poll the bank file for edits; 0 disables
+# Multi-worker mode (see serve_workers.py): sessions in a shared SQLite file, leaderboard tails the results file.
+SESSIONS_DB_PATH = os.environ.get("QUIZ_SESSIONS_PATH", "")
+REGISTRY_PATH = os.environ.get("QUIZ_REGISTRY_PATH", "quiz_participants.db")
+REPEAT_POLICY = os.environ.get("QUIZ_REPEAT_POLICY", "warn")  # allow | warn | block repeat entrants
+WORKER_MODE = os.environ.get("QUIZ_WORKER_MODE", "0") == "1"
+SHARE = os.environ.get("QUIZ_SHARE", "1") == "1"
+CLIENT_PACK_MODE = os.environ.get("QUIZ_CLIENT_PACK", "0") == "1"  # answer in the browser, one scoring call per quiz
+PROFILE_HZ = int(os.environ.get("QUIZ_PROFILE_HZ", "0"))  # opt-in sampling profiler, served at /profile
 NUM_QUESTIONS = 10
+LEADERBOARD_SIZE = 10
+BALANCE_SUBJECTS = True
+SESSION_TTL_SECONDS = 30 * 60
+MAX_SESSIONS = 10000
 
 # --- Color Palette ---
 COLOR_BLUE_LIGHTEST = "#00aeef"
@@ -51,49 +77,101 @@ In addition to achieving a draw, participants must complete the registration for
 """
 
 # --- Utility Functions & HTML Generation ---
-def convert_image_to_base64(image_path):
-    try:
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-    except FileNotFoundError:
-        print(f"Warning: Image not found at {image_path}.")
-        return None
+metrics = Metrics()
+
+# Images are served from /quiz-static as resized, content-hashed variants with long-lived cache headers.
+asset_store = AssetStore(ASSET_CACHE_DIR)
 
-logo_data = convert_image_to_base64(LOGO_PATH)
-LOGO_HTML = f'<div id="logo-container"><img id="logo-image" src="data:image/png;base64,{logo_data}" alt="Deep by POST Group Logo"></div>' if logo_data else '<div id="logo-container"><div id="logo-fallback">Deep by POST Group</div></div>'
+logo_asset = asset_store.add("deep_logo", LOGO_PATH, max_width=500)
+LOGO_HTML = f'<div id="logo-container">{logo_asset.img_tag("logo-image", "Deep by POST Group Logo")}</div>' if logo_asset else '<div id="logo-container"><div id="logo-fallback">Deep by POST Group</div></div>'
 
-banner_data = convert_image_to_base64(BANNER_IMAGE_PATH)
-BANNER_HTML = f'<div id="banner-container"><img id="banner-image" src="data:image/png;base64,{banner_data}" alt="AI Quiz Challenge Banner"></div>' if banner_data else '<h1>🧠 AI Quiz Challenge</h1>'
+banner_asset = asset_store.add("hcw_banner", BANNER_IMAGE_PATH, max_width=1600)
+BANNER_HTML = f'<div id="banner-container">{banner_asset.img_tag("banner-image", "AI Quiz Challenge Banner")}</div>' if banner_asset else '<h1>🧠 AI Quiz Challenge</h1>'
 
-welcome_banner_data = convert_image_to_base64(WELCOME_BANNER_PATH)
-WELCOME_BANNER_HTML = f'<div id="welcome-banner-container"><img id="welcome-banner-image" src="data:image/png;base64,{welcome_banner_data}" alt="Welcome to the AI Challenge"></div>' if welcome_banner_data else ''
+welcome_banner_asset = asset_store.add("prize_banner", WELCOME_BANNER_PATH, max_width=1600)
+WELCOME_BANNER_HTML = f'<div id="welcome-banner-container">{welcome_banner_asset.img_tag("welcome-banner-image", "Welcome to the AI Challenge")}</div>' if welcome_banner_asset else ''
 
 os.environ['HTTP_PROXY'], os.environ['HTTPS_PROXY'] = '', ''
 
+def concurrency_limit(handler):
+    # QUIZ_CONCURRENCY_<HANDLER>=8 (or "none"); unset keeps Gradio's default (GRADIO_DEFAULT_CONCURRENCY_LIMIT).
+    value = os.environ.get(f"QUIZ_CONCURRENCY_{handler.upper()}")
+    if value is None:
+        return "default"
+    return None if value.lower() == "none" else int(value)
+
 def is_valid_email(email):
     return re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email or "") is not None
 
-def load_questions_from_jsonl(file_path=QUIZ_FILE_PATH):
-    try:
-        return pd.read_json(file_path, lines=True).to_dict(orient='records')
-    except (FileNotFoundError, ValueError) as e:
-        print(f"Error loading questions: {e}")
-        return []
-
-full_question_bank = load_questions_from_jsonl(QUIZ_FILE_PATH)
+# The bank is swapped atomically on reload: new quizzes use the new bank, while each
+# session keeps a reference to the bank it started with.
+def publish_bank(bank):
+    global full_question_bank, quiz_sampler
+    # Draws quiz sets whose AI score falls in the band promised for the chosen tier.
+    sampler = QuizSampler(bank)
+    question_cards(bank, previous=full_question_bank)  # render now, not on the first click; appends reuse the old cards
+    full_question_bank, quiz_sampler = bank, sampler
+    metrics.observe("load_question_bank", bank_loader.last_load_seconds)
+
+full_question_bank = None
+bank_loader = BankLoader(QUIZ_FILE_PATH, on_swap=publish_bank)
+full_question_bank = bank_loader.load()  # memory-mapped binary cache, rebuilt when the JSONL changes
+if not full_question_bank:
+    publish_bank(full_question_bank)
+
+# Only a session token lives in gr.State; progress and scores are kept here.
+if SESSIONS_DB_PATH:
+    session_store = SqliteSessionStore(SESSIONS_DB_PATH, lambda: full_question_bank,
+                                       ttl=SESSION_TTL_SECONDS, max_sessions=MAX_SESSIONS)
+else:
+    session_store = SessionStore(ttl=SESSION_TTL_SECONDS, max_sessions=MAX_SESSIONS)
 
 # --- MODIFIED: Function updated to remove phone number ---
+# Results are queued and appended in batches by a background writer (flushed on exit).
+results_sink = CsvResultsSink(RESULTS_FILE_PATH, batch_size=64, flush_interval=1.0)
+atexit.register(results_sink.close)
+# One fixed-size binary record per answered question, batched the same way.
+answer_log = AnswerLogSink(ANSWERS_FILE_PATH, batch_size=256, flush_interval=2.0)
+atexit.register(answer_log.close)
+# Everyone who has played, keyed by normalized email; checked at start_quiz without touching the results file.
+participant_registry = ParticipantRegistry(REGISTRY_PATH, shared=WORKER_MODE, batch_size=64, flush_interval=1.0)
+participant_registry.load()
+participant_registry.import_results(RESULTS_FILE_PATH)  # first run only: seed from earlier results
+atexit.register(participant_registry.close)
+
+@metrics.timed("save_results_to_csv")
 def save_results_to_csv(name, email, company, job_title, user_score, ai_score, ai_model):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    new_data = pd.DataFrame([[timestamp, name, email, company, job_title, user_score, ai_score, ai_model]],
-                            columns=['Timestamp', 'Name', 'Email', 'Company', 'JobTitle', 'UserScore', 'AIScore', 'AIModel'])
-    new_data.to_csv('quiz_results.csv', mode='a', header=not os.path.isfile('quiz_results.csv'), index=False)
+    results_sink.submit([timestamp, name, email, company, job_title, user_score, ai_score, ai_model])
+    participant_registry.record_completion(email, name, company)
+    if not WORKER_MODE:  # workers pick their own rows up from the shared file like everyone else's
+        leaderboard.record(name, email, user_score, ai_score, ai_model, timestamp)
+
+# Per-tier win/draw/loss counts and the top players, rebuilt from the results file once at startup.
+leaderboard = LeaderboardStats(top_n=LEADERBOARD_SIZE)
+leaderboard.load_results(RESULTS_FILE_PATH)
+if WORKER_MODE:
+    leaderboard.follow(RESULTS_FILE_PATH, interval=1.0)
+
+metrics.gauge("active_sessions", "Live quiz sessions.", lambda: len(session_store))
+metrics.gauge("bank_questions", "Questions in the loaded bank.", lambda: len(full_question_bank))
+metrics.gauge("bank_load_seconds", "Time taken by the last question bank (re)load.", lambda: bank_loader.last_load_seconds)
+metrics.gauge("bank_reloads", "Question bank loads and reloads.", lambda: bank_loader.reloads)
+metrics.gauge("bank_rejected_records", "Invalid question records skipped on reload.", lambda: bank_loader.rejected)
+metrics.gauge("results_queue_depth", "Results waiting to be flushed.", lambda: results_sink.stats()['queue_depth'])
+metrics.gauge("results_last_flush_ms", "Duration of the last results flush.", lambda: results_sink.stats()['last_flush_ms'])
+metrics.gauge("results_max_flush_ms", "Slowest results flush so far.", lambda: results_sink.stats()['max_flush_ms'])
+metrics.gauge("results_flush_errors", "Failed results flushes.", lambda: results_sink.stats()['flush_errors'])
+metrics.gauge("answer_log_queue_depth", "Answer records waiting to be flushed.", lambda: answer_log.stats()['queue_depth'])
+metrics.gauge("answer_log_flush_errors", "Failed answer log flushes.", lambda: answer_log.stats()['flush_errors'])
+metrics.gauge("registered_participants", "Distinct participants in the registry.", lambda: len(participant_registry))
 
 # --- Gradio Core Functions ---
 def show_login_form():
     return {welcome_row: gr.update(visible=False), login_row: gr.update(visible=True)}
 
 # --- MODIFIED: Function updated to remove phone number ---
+@metrics.timed("start_quiz")
 def start_quiz(name, email, company, job_title, ai_model, terms_agreed):
     error_messages = []
     if not name.strip(): error_messages.append("Full Name is required.")
@@ -103,6 +181,13 @@ def start_quiz(name, email, company, job_title, ai_model, terms_agreed):
     if not job_title.strip(): error_messages.append("Job Title is required.")
     if not terms_agreed: error_messages.append("You must agree to the terms and conditions.")
 
+    if not error_messages and REPEAT_POLICY != "allow":
+        _, completions, namesakes = participant_registry.history(email, name, company, verify=REPEAT_POLICY == "block")
+        if completions and REPEAT_POLICY == "block":
+            error_messages.append("This email has already completed the quiz. Each participant can take part once.")
+        elif completions or namesakes:
+            gr.Warning("Welcome back! Only your best result counts for the raffle draw, so replays don't add entries.")
+
     if error_messages:
         return {
             login_row: gr.update(visible=True),
@@ -110,7 +195,9 @@ def start_quiz(name, email, company, job_title, ai_model, terms_agreed):
             quiz_row: gr.update(visible=False), score_display_row: gr.update(visible=False),
             main_banner_row: gr.update(visible=False)
         }
-    if not full_question_bank:
+    sampler = quiz_sampler  # read once: a sampler and its bank always belong together
+    bank = sampler.bank
+    if not bank:
         return {
             login_row: gr.update(visible=True),
             start_error_msg: gr.update(value="Error: No questions loaded.", visible=True),
@@ -118,18 +205,13 @@ def start_quiz(name, email, company, job_title, ai_model, terms_agreed):
             main_banner_row: gr.update(visible=False)
         }
 
-    quiz_questions = random.sample(full_question_bank, min(NUM_QUESTIONS, len(full_question_bank)))
-    first_question = quiz_questions[0]
-    options = [first_question['opa'], first_question['opb'], first_question['opc'], first_question['opd']]
-
-    percentage = (1 / len(quiz_questions)) * 100
-    question_title_html = f'''
-        <div class="progress-container">
-            <div class="progress-bar-fill" style="width: {percentage}%;"></div>
-            <div class="progress-text">Question 1 / {len(quiz_questions)}</div>
-        </div>
-    '''
-    question_display_html = f'<div id="question-card"><span>{first_question["question"]}</span></div>'
+    quiz_rows = sampler.draw(ai_model, NUM_QUESTIONS, balance_subjects=BALANCE_SUBJECTS)
+    session_token = session_store.create(bank, [bank.ids[row] for row in quiz_rows], name, email, company, job_title, ai_model)
+    participant_registry.record_start(email, name, company)
+    first_row = quiz_rows[0]
+    options = bank.option_list(first_row)
+    question_title_html = progress_bars(len(quiz_rows))[0]
+    question_display_html = question_cards(bank)[first_row]
 
     return {
         login_row: gr.update(visible=False), score_display_row: gr.update(visible=True),
@@ -138,21 +220,55 @@ def start_quiz(name, email, company, job_title, ai_model, terms_agreed):
         question_display: gr.update(value=question_display_html),
         choice_a_button: gr.update(value=options[0], visible=True), choice_b_button: gr.update(value=options[1], visible=True),
         choice_c_button: gr.update(value=options[2], visible=True), choice_d_button: gr.update(value=options[3], visible=True),
-        question_state: quiz_questions, user_score_state: 0, ai_score_state: 0, q_index_state: 0,
-        user_name_state: name, user_email_state: email, 
-        company_name_state: company, job_title_state: job_title,
-        ai_model_state: ai_model,
-        user_score_display: gr.update(value='<div class="score-card" id="user-score-card">Human<br><span class="score-value">0</span></div>'),
-        ai_score_display: gr.update(value='<div class="score-card" id="ai-score-card">AI<br><span class="score-value">0</span></div>'),
+        session_state: session_token,
+        user_score_display: gr.update(value=score_card('user', 0)),
+        ai_score_display: gr.update(value=score_card('ai', 0)),
         reset_button: gr.update(visible=False),
         main_banner_row: gr.update(visible=True),
+        **({quiz_pack_box: build_pack(bank, quiz_rows, ai_model), feedback_row: gr.update(visible=True),
+            feedback_text: gr.update(value="")} if CLIENT_PACK_MODE else {}),
+    }
+
+def session_expired():
+    return {
+        quiz_row: gr.update(visible=False), feedback_row: gr.update(visible=False), end_row: gr.update(visible=True),
+        final_result_text: gr.update(value=result_banner("⌛ Your quiz session has expired. Please start again.")),
+        choice_a_button: gr.update(visible=False), choice_b_button: gr.update(visible=False),
+        choice_c_button: gr.update(visible=False), choice_d_button: gr.update(visible=False),
+        reset_button: gr.update(visible=True)
+    }
+
+def finish_quiz(session, session_token, user_score, ai_score):
+    name = session.name
+    save_results_to_csv(name, session.email, session.company, session.job_title, user_score, ai_score, session.ai_model) # Removed phone from save
+    # The finished session stays until reset (or its TTL), so a late double click is recognised as one.
+    winner_text = f"🤝 It's a draw! {user_score} to {ai_score}."
+    if user_score > ai_score: winner_text = f"🎉 Congratulations, {name}! You won {user_score} to {ai_score}."
+    elif ai_score > user_score: winner_text = f"🤖 The AI won {ai_score} to {user_score}. Better luck next time!"
+    return {
+        quiz_row: gr.update(visible=False), feedback_row: gr.update(visible=False), end_row: gr.update(visible=True),
+        final_result_text: gr.update(value=result_banner(winner_text)),
+        user_score_display: score_card('user', user_score), ai_score_display: score_card('ai', ai_score),
+        choice_a_button: gr.update(visible=False), choice_b_button: gr.update(visible=False),
+        choice_c_button: gr.update(visible=False), choice_d_button: gr.update(visible=False),
+        reset_button: gr.update(visible=True)
     }
 
 # --- MODIFIED: Function updated to remove phone number ---
-def process_answer(user_answer, q_index, user_score, ai_score, questions, name, email, company, job_title, ai_model):
-    current_question, num_questions = questions[q_index], len(questions)
-    options = [current_question['opa'], current_question['opb'], current_question['opc'], current_question['opd']]
-    correct_answer_index, ai_answer_index = current_question['cop'], current_question.get(ai_model, 0)
+@metrics.timed("process_answer")
+def process_answer(user_answer, session_token):
+    session = session_store.get(session_token)
+    if session is None:
+        return session_expired()
+    if session.q_index >= len(session.question_ids):
+        return {}  # a click after the last answer; the result banner is already showing
+    question_ids, q_index, ai_model = session.question_ids, session.q_index, session.ai_model
+    user_score, ai_score = session.user_score, session.ai_score
+    bank = session.bank
+    current_row, num_questions = bank.row(question_ids[q_index]), len(question_ids)
+    options = bank.option_list(current_row)
+    correct_answer_index = bank.correct[current_row]
+    ai_answer_index = bank.answer(current_row, ai_model)
 
     try:
         user_choice_index = options.index(user_answer)
@@ -163,48 +279,53 @@ def process_answer(user_answer, q_index, user_score, ai_score, questions, name,
 
     if ai_answer_index == correct_answer_index: ai_score += 1
 
-    feedback = (f"Your answer: **{CHOICES[user_choice_index] if user_choice_index != -1 else 'N/A'}** ({'✅ Correct' if user_correct else '❌ Incorrect'}).\n"
-                f"AI's answer: **{CHOICES[ai_answer_index]}** ({'✅ Correct' if ai_answer_index == correct_answer_index else '❌ Incorrect'}).\n"
-                f"The correct answer was: **{CHOICES[correct_answer_index]}**.")
-
+    now, shown_at = session_store.clock(), session.shown_at
+    if not session_store.advance(session_token, session, q_index, q_index + 1, user_score, ai_score, now):
+        return {}  # a double click: the first one already scored this question and renders the next
+    answer_log.log(session_token, question_ids[q_index], user_choice_index, user_correct, ai_model, now - shown_at, q_index)
     q_index += 1
-    user_score_html = f'<div class="score-card" id="user-score-card">Human<br><span class="score-value">{user_score}</span></div>'
-    ai_score_html = f'<div class="score-card" id="ai-score-card">AI<br><span class="score-value">{ai_score}</span></div>'
 
     if q_index >= num_questions:
-        save_results_to_csv(name, email, company, job_title, user_score, ai_score, ai_model) # Removed phone from save
-        winner_text = f"🤝 It's a draw! {user_score} to {ai_score}."
-        if user_score > ai_score: winner_text = f"🎉 Congratulations, {name}! You won {user_score} to {ai_score}."
-        elif ai_score > user_score: winner_text = f"🤖 The AI won {ai_score} to {user_score}. Better luck next time!"
-        winner_html = f'<div id="final-result-banner">{winner_text}</div>'
-        return {
-            quiz_row: gr.update(visible=False), feedback_row: gr.update(visible=False), end_row: gr.update(visible=True),
-            final_result_text: gr.update(value=winner_html), user_score_display: user_score_html, ai_score_display: ai_score_html,
-            choice_a_button: gr.update(visible=False), choice_b_button: gr.update(visible=False),
-            choice_c_button: gr.update(visible=False), choice_d_button: gr.update(visible=False),
-            reset_button: gr.update(visible=True)
-        }
+        return finish_quiz(session, session_token, user_score, ai_score)
     else:
-        next_question = questions[q_index]
-        next_options = [next_question['opa'], next_question['opb'], next_question['opc'], next_question['opd']]
-        percentage = ((q_index + 1) / num_questions) * 100
-        question_title_html = f'''
-            <div class="progress-container">
-                <div class="progress-bar-fill" style="width: {percentage}%;"></div>
-                <div class="progress-text">Question {q_index + 1} / {num_questions}</div>
-            </div>
-        '''
-        question_display_html = f'<div id="question-card"><span>{next_question["question"]}</span></div>'
+        next_row = bank.row(question_ids[q_index])
+        next_options = bank.option_list(next_row)
+        question_title_html = progress_bars(num_questions)[q_index]
+        question_display_html = question_cards(bank)[next_row]
+        feedback = answer_feedback(user_choice_index, ai_answer_index, correct_answer_index)
         return {
-            q_index_state: q_index, user_score_state: user_score, ai_score_state: ai_score,
             question_title: gr.update(value=question_title_html), question_display: gr.update(value=question_display_html),
             choice_a_button: gr.update(value=next_options[0]), choice_b_button: gr.update(value=next_options[1]),
             choice_c_button: gr.update(value=next_options[2]), choice_d_button: gr.update(value=next_options[3]),
             feedback_row: gr.update(visible=True), feedback_text: gr.update(value=feedback),
-            user_score_display: user_score_html, ai_score_display: ai_score_html,
+            user_score_display: score_card('user', user_score), ai_score_display: score_card('ai', ai_score),
             quiz_row: gr.update(visible=True), end_row: gr.update(visible=False),
         }
 
+# Pack mode: the browser has played the whole quiz; re-score its choices against the session.
+@metrics.timed("finish_quiz_pack")
+def finish_quiz_pack(submission, session_token):
+    if not submission:
+        return {}  # cleared by a reset
+    session = session_store.get(session_token)
+    if session is None:
+        return session_expired()
+    if session.q_index:
+        return {}  # already submitted
+    try:
+        choices, seconds = parse_submission(submission, len(session.question_ids))
+    except ValueError:
+        return session_expired()
+    scored = score_submission(session.bank, session.question_ids, session.ai_model, choices)
+    user_score = sum(user_correct for _, user_correct, _, _ in scored)
+    ai_score = sum(ai_answer == correct for _, _, ai_answer, correct in scored)
+    if not session_store.advance(session_token, session, 0, len(scored), user_score, ai_score, session.shown_at):
+        return {}  # submitted twice; the first submission finishes the quiz
+    for position, (chosen, user_correct, _, _) in enumerate(scored):
+        answer_log.log(session_token, session.question_ids[position], chosen, user_correct, session.ai_model,
+                       seconds[position], position)
+    return finish_quiz(session, session_token, user_score, ai_score)
+
 # --- Gradio UI Layout & Custom CSS ---
 custom_css = f"""
 :root {{ --body-background-fill: #f0f4f8; }}
@@ -212,7 +333,7 @@ body {{ background-color: var(--body-background-fill); font-family: 'Inter', san
 .gradio-container {{ max-width: 900px !important; margin: auto; padding: 2rem; background-color: #ffffff; border-radius: 16px; box-shadow: 0 8px 30px rgba(0,0,0,0.12); }}
 h1, .markdown h1 {{ text-align: center; color: {COLOR_BLUE_DARK}; font-weight: 800; font-size: 2.8rem; margin-bottom: 1rem; }}
 #logo-container {{ text-align: center; margin-bottom: 1rem; }}
-#logo-image {{ max-width: 250px; max-height: 100px; }}
+#logo-image {{ max-width: 250px; max-height: 100px; width: auto; height: auto; }}
 .prize-text {{ color: #f1c40f; font-weight: 700; }}
 #tc-popup-row {{ position: fixed; top: 0; left: 0; width: 100%; height: 100%; background-color: rgba(0, 0, 0, 0.6); z-index: 1000; display: flex; align-items: center; justify-content: center; }}
 #tc-popup-group {{ background: white; padding: 2rem; border-radius: 12px; max-width: 700px; box-shadow: 0 5px 25px rgba(0,0,0,0.3); }}
@@ -223,6 +344,7 @@ h1, .markdown h1 {{ text-align: center; color: {COLOR_BLUE_DARK}; font-weight: 8
 }}
 #banner-image {{
     width: 100%;
+    height: auto;
     border-radius: 12px;
     box-shadow: 0 4px 15px rgba(0,0,0,0.1);
 }}
@@ -233,6 +355,7 @@ h1, .markdown h1 {{ text-align: center; color: {COLOR_BLUE_DARK}; font-weight: 8
 }}
 #welcome-banner-image {{
     width: 100%;
+    height: auto;
     border-radius: 12px;
     box-shadow: 0 4px 15px rgba(0,0,0,0.1);
 }}
@@ -292,6 +415,12 @@ h1, .markdown h1 {{ text-align: center; color: {COLOR_BLUE_DARK}; font-weight: 8
 #ai-score-card {{ background-color: {COLOR_BLUE_DARK}; }}
 .score-value {{ font-size: 3.5rem; color: #ffffff; font-weight: 700; display: block; line-height: 1; }}
 
+#leaderboard {{ text-align: center; }}
+.leaderboard-table {{ width: 100%; border-collapse: collapse; margin: 0.5rem 0 1rem 0; }}
+.leaderboard-table th {{ background-color: {COLOR_BLUE_DARK}; color: #ffffff; padding: 0.5rem; }}
+.leaderboard-table td {{ padding: 0.4rem; border-bottom: 1px solid #dee2e6; }}
+.leaderboard-footer {{ color: {COLOR_BLUE_DARK}; font-weight: 600; }}
+
 #error-msg .markdown {{ color: #e74c3c; font-weight: bold; text-align: center; }}
 
 @keyframes pulse-glow {{ 0%, 100% {{ box-shadow: 0 0 5px rgba(0, 174, 239, 0.3); }} 50% {{ box-shadow: 0 0 25px rgba(0, 174, 239, 0.7); }} }}
@@ -305,11 +434,11 @@ h1, .markdown h1 {{ text-align: center; color: {COLOR_BLUE_DARK}; font-weight: 8
 """
 
 with gr.Blocks(css=custom_css, title="AI Quiz Challenge") as demo:
-    # --- MODIFIED: Removed user_phone_state ---
-    state_vars = [gr.State(v) for v in [[], 0, 0, 0, "", "", "", "", "gpt-4.1-nano"]]
-    question_state, user_score_state, ai_score_state, q_index_state, \
-    user_name_state, user_email_state, company_name_state, \
-    job_title_state, ai_model_state = state_vars
+    # Only the session token is kept per browser tab; see session_store.
+    session_state = gr.State("")
+    # Pack mode only: the quiz pack and the final answers live in the page (see quiz_pack).
+    quiz_pack_box = gr.Textbox(visible="hidden")
+    pack_submission_box = gr.Textbox(visible="hidden")
 
     gr.HTML(LOGO_HTML)
 
@@ -317,8 +446,8 @@ with gr.Blocks(css=custom_css, title="AI Quiz Challenge") as demo:
         gr.HTML(BANNER_HTML)
 
     with gr.Row(visible=False) as score_display_row:
-        user_score_display = gr.HTML(value='<div class="score-card" id="user-score-card">Human<br><span class="score-value">0</span></div>')
-        ai_score_display = gr.HTML(value='<div class="score-card" id="ai-score-card">AI<br><span class="score-value">0</span></div>')
+        user_score_display = gr.HTML(value=score_card('user', 0))
+        ai_score_display = gr.HTML(value=score_card('ai', 0))
 
     with gr.Row(visible=True, variant="panel") as welcome_row:
         with gr.Column():
@@ -367,7 +496,15 @@ with gr.Blocks(css=custom_css, title="AI Quiz Challenge") as demo:
             final_result_text = gr.HTML()
             reset_button = gr.Button("Reset Quiz", elem_classes="secondary", visible=False)
 
+    with gr.Accordion("🏆 Leaderboard", open=False):
+        leaderboard_html = gr.HTML()
+        refresh_leaderboard_button = gr.Button("Refresh", elem_classes="secondary", size="sm")
+
     # --- Logic Bindings ---
+    # Served from the in-memory stats; never touches the results file.
+    demo.load(leaderboard.render_html, outputs=[leaderboard_html], concurrency_limit=concurrency_limit("render_html"))
+    refresh_leaderboard_button.click(leaderboard.render_html, outputs=[leaderboard_html],
+                                     concurrency_limit=concurrency_limit("render_html"))
     show_login_button.click(fn=show_login_form, outputs=[welcome_row, login_row])
     view_tc_button.click(lambda: gr.update(visible=True), outputs=[tc_popup_row])
     close_tc_button.click(lambda: gr.update(visible=False), outputs=[tc_popup_row])
@@ -376,18 +513,30 @@ with gr.Blocks(css=custom_css, title="AI Quiz Challenge") as demo:
     start_inputs = [name_box, email_box, company_box, job_title_box, ai_model_dropdown, terms_checkbox]
     start_outputs = [login_row, score_display_row, start_error_msg, quiz_row, question_title, question_display,
                      choice_a_button, choice_b_button, choice_c_button, choice_d_button,
-                     *state_vars, user_score_display, ai_score_display, reset_button, main_banner_row]
-    start_button.click(fn=start_quiz, inputs=start_inputs, outputs=start_outputs)
+                     session_state, user_score_display, ai_score_display, reset_button, main_banner_row,
+                     quiz_pack_box, feedback_row, feedback_text]
+    start_event = start_button.click(fn=start_quiz, inputs=start_inputs, outputs=start_outputs,
+                                     concurrency_limit=concurrency_limit("start_quiz"))
 
-    # --- MODIFIED: Removed user_phone_state from inputs ---
-    answer_inputs = [q_index_state, user_score_state, ai_score_state, question_state, user_name_state,
-                     user_email_state, company_name_state, job_title_state, ai_model_state]
-    answer_outputs = [q_index_state, user_score_state, ai_score_state, question_title, question_display,
+    answer_inputs = [session_state]
+    answer_outputs = [question_title, question_display,
                       choice_a_button, choice_b_button, choice_c_button, choice_d_button, feedback_row,
                       feedback_text, user_score_display, ai_score_display, quiz_row, end_row, final_result_text, reset_button]
 
-    for btn in [choice_a_button, choice_b_button, choice_c_button, choice_d_button]:
-        btn.click(fn=process_answer, inputs=[btn] + answer_inputs, outputs=answer_outputs)
+    if CLIENT_PACK_MODE:
+        start_event.then(fn=None, js=PACK_STAMP_JS, inputs=[quiz_pack_box], outputs=[quiz_pack_box])
+        pack_outputs = [question_title, question_display, choice_a_button, choice_b_button, choice_c_button,
+                        choice_d_button, feedback_text, user_score_display, ai_score_display, quiz_pack_box, pack_submission_box]
+        for btn in [choice_a_button, choice_b_button, choice_c_button, choice_d_button]:
+            btn.click(fn=None, js=PACK_ANSWER_JS, inputs=[btn, quiz_pack_box], outputs=pack_outputs)
+        pack_submission_box.change(fn=finish_quiz_pack, inputs=[pack_submission_box] + answer_inputs, outputs=answer_outputs,
+                                   concurrency_limit=concurrency_limit("finish_quiz_pack"))
+    else:
+        # The four buttons share one slot, as Gradio already groups them by handler; QUIZ_CONCURRENCY_PROCESS_ANSWER
+        # sets its size.
+        for btn in [choice_a_button, choice_b_button, choice_c_button, choice_d_button]:
+            btn.click(fn=process_answer, inputs=[btn] + answer_inputs, outputs=answer_outputs,
+                      concurrency_limit=concurrency_limit("process_answer"), concurrency_id="process_answer")
 
     # --- MODIFIED: Updated reset logic map to remove phone fields ---
     reset_outputs_map = {
@@ -397,17 +546,30 @@ with gr.Blocks(css=custom_css, title="AI Quiz Challenge") as demo:
         ai_model_dropdown: gr.update(value="gpt-4.1-nano"),
         terms_checkbox: gr.update(value=False), start_error_msg: gr.update(value="", visible=False),
         quiz_row: gr.update(visible=False), feedback_row: gr.update(visible=False), end_row: gr.update(visible=False),
-        user_score_display: gr.update(value='<div class="score-card" id="user-score-card">Human<br><span class="score-value">0</span></div>'),
-        ai_score_display: gr.update(value='<div class="score-card" id="ai-score-card">AI<br><span class="score-value">0</span></div>'),
+        user_score_display: gr.update(value=score_card('user', 0)),
+        ai_score_display: gr.update(value=score_card('ai', 0)),
         choice_a_button: gr.update(visible=False), choice_b_button: gr.update(visible=False),
         choice_c_button: gr.update(visible=False), choice_d_button: gr.update(visible=False),
         feedback_text: gr.update(value=""), reset_button: gr.update(visible=False),
-        q_index_state: 0, user_score_state: 0, ai_score_state: 0, question_state: [],
-        user_name_state: "", user_email_state: "", company_name_state: "", job_title_state: "",
-        ai_model_state: "gpt-4.1-nano",
+        session_state: "", quiz_pack_box: "", pack_submission_box: "",
         main_banner_row: gr.update(visible=False)
     }
-    reset_button.click(lambda: list(reset_outputs_map.values()), outputs=list(reset_outputs_map.keys()))
+
+    def reset_quiz(session_token):
+        session_store.discard(session_token)
+        return list(reset_outputs_map.values())
+
+    reset_button.click(reset_quiz, inputs=[session_state], outputs=list(reset_outputs_map.keys()),
+                       concurrency_limit=concurrency_limit("reset_quiz"))
 
 if __name__ == "__main__":
-    demo.launch(share=True)
+    if BANK_RELOAD_SECONDS:
+        bank_loader.watch(BANK_RELOAD_SECONDS)
+    if METRICS_PORT:
+        profiler = SamplingProfiler(hz=PROFILE_HZ).start() if PROFILE_HZ else None
+        try:
+            metrics.serve(METRICS_PORT, profiler=profiler)
+        except OSError as e:
+            print(f"Warning: metrics endpoint not started on port {METRICS_PORT}: {e}")
+    # Workers get GRADIO_SERVER_NAME / GRADIO_SERVER_PORT and QUIZ_SHARE=0 from serve_workers.py.
+    demo.launch(share=SHARE, app_kwargs={"routes": asset_store.routes()})
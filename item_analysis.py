@@ -0,0 +1,125 @@
+"""Item analysis over the binary answer log.
+
+For every question it reports how many times it was answered, its difficulty
+(share of correct answers, the classical p-value) and its discrimination: the
+point-biserial correlation between answering it correctly and the rest of the
+session's score. Questions that strong players miss as often as weak ones
+(discrimination near or below zero) are usually ambiguous or mis-keyed.
+
+The log is memory-mapped as a NumPy structured array and all statistics are
+computed with sorts and bincounts, so millions of answers take seconds. Only
+sessions that answered at least --min-session-answers questions count, so
+abandoned quizzes do not drag the rest scores down.
+
+    python item_analysis.py quiz_answers.bin --out item_stats.csv
+    python item_analysis.py quiz_answers.bin --bank test_bank_200.jsonl --flag-below 0.05
+"""
+import argparse
+import csv
+import os
+import uuid
+
+import numpy as np
+
+from answer_log import ANSWER_DTYPE, ANSWER_LOG_MAGIC, question_key
+
+ITEM_STATS_COLUMNS = ['id', 'answers', 'difficulty', 'discrimination', 'mean_response_ms']
+
+
+def read_answers(path):
+    """Memory-map an answer log; a torn trailing record is ignored."""
+    with open(path, 'rb') as f:
+        if f.read(len(ANSWER_LOG_MAGIC)) != ANSWER_LOG_MAGIC:
+            raise ValueError(f"{path} is not an answer log")
+    count = (os.path.getsize(path) - len(ANSWER_LOG_MAGIC)) // ANSWER_DTYPE.itemsize
+    if count <= 0:
+        return np.empty(0, dtype=ANSWER_DTYPE)
+    return np.memmap(path, dtype=ANSWER_DTYPE, mode='r', offset=len(ANSWER_LOG_MAGIC), shape=(count,))
+
+
+def item_statistics(answers, min_session_answers=10):
+    """Per-question statistics; returns (question keys, dict of per-question arrays)."""
+    sessions, session_of, per_session = np.unique(answers['session'], return_inverse=True, return_counts=True)
+    keep = per_session[session_of] >= min_session_answers
+    answers, session_of = answers[keep], session_of[keep]
+
+    correct = answers['correct'].astype(np.float64)
+    totals = np.bincount(session_of, weights=correct, minlength=len(sessions))
+    rest = totals[session_of] - correct  # session score excluding this item
+
+    keys, item_of = np.unique(answers['question'], return_inverse=True)
+    k = len(keys)
+    n = np.bincount(item_of, minlength=k).astype(np.float64)
+    n_correct = np.bincount(item_of, weights=correct, minlength=k)
+    sum_rest = np.bincount(item_of, weights=rest, minlength=k)
+    sum_rest_sq = np.bincount(item_of, weights=rest * rest, minlength=k)
+    sum_rest_correct = np.bincount(item_of, weights=rest * correct, minlength=k)
+    sum_ms = np.bincount(item_of, weights=answers['response_ms'], minlength=k)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = n_correct / n
+        mean_rest = sum_rest / n
+        cov = sum_rest_correct / n - p * mean_rest
+        var_rest = sum_rest_sq / n - mean_rest * mean_rest
+        discrimination = cov / np.sqrt(p * (1 - p) * var_rest)  # NaN if everyone (or no one) got it right
+        mean_ms = sum_ms / n
+    return keys, {'answers': n.astype(np.int64), 'difficulty': p, 'discrimination': discrimination,
+                  'mean_response_ms': mean_ms}
+
+
+def question_ids(keys, bank=None):
+    """Map 16-byte question keys back to ids (via the bank for ids that are not UUIDs)."""
+    by_key = {question_key(qid): qid for qid in bank.ids} if bank is not None else {}
+    ids = []
+    for key in keys:
+        raw = key.tobytes()
+        ids.append(by_key.get(raw) or str(uuid.UUID(bytes=raw)))
+    return ids
+
+
+def write_item_stats(path, ids, stats):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ITEM_STATS_COLUMNS)
+        for i, qid in enumerate(ids):
+            writer.writerow([qid, int(stats['answers'][i]), round(float(stats['difficulty'][i]), 4),
+                             round(float(stats['discrimination'][i]), 4), round(float(stats['mean_response_ms'][i]), 1)])
+
+
+def load_item_stats(path):
+    """Read an item stats CSV back as {question id: row dict}, e.g. to tune question selection."""
+    with open(path, newline='', encoding='utf-8') as f:
+        return {row['id']: {'answers': int(row['answers']), 'difficulty': float(row['difficulty']),
+                            'discrimination': float(row['discrimination']),
+                            'mean_response_ms': float(row['mean_response_ms'])}
+                for row in csv.DictReader(f)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help='binary answer log written by the quiz app (QUIZ_ANSWERS_PATH)')
+    parser.add_argument('--out', default='item_stats.csv')
+    parser.add_argument('--bank', help='question bank JSONL, to resolve ids that are not UUIDs')
+    parser.add_argument('--min-session-answers', type=int, default=10)
+    parser.add_argument('--min-answers', type=int, default=30, help='answers needed before an item is flagged')
+    parser.add_argument('--flag-below', type=float, default=0.0, help='flag items with discrimination below this')
+    args = parser.parse_args()
+
+    bank = None
+    if args.bank:
+        from question_bank import load_bank
+        bank = load_bank(args.bank)
+    answers = read_answers(args.log)
+    keys, stats = item_statistics(answers, args.min_session_answers)
+    ids = question_ids(keys, bank)
+    write_item_stats(args.out, ids, stats)
+    print(f"{len(answers)} answers, {len(ids)} questions written to {args.out}")
+
+    flagged = np.flatnonzero((stats['answers'] >= args.min_answers) & (stats['discrimination'] < args.flag_below))
+    for i in flagged[np.argsort(stats['discrimination'][flagged])]:
+        print(f"  review {ids[i]}: discrimination {stats['discrimination'][i]:.3f}, "
+              f"difficulty {stats['difficulty'][i]:.3f} over {stats['answers'][i]} answers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Live leaderboard and win-rate stats, maintained incrementally.
+
+``record`` is O(1) in the number of finished quizzes: it bumps per-tier counters
+(overall and per day), updates the player's best result and, only if that result
+makes the top N, re-sorts the N-entry board. ``load_results`` replays the results
+file once at startup. ``render_html`` is cached per version, so refreshing the
+leaderboard view never reads the disk or recomputes anything.
+
+With several worker processes appending to one results file, each worker calls
+``follow`` instead of ``record``: it tails the file, so every worker's board
+includes everyone's results.
+"""
+import csv
+import html
+import io
+import threading
+from collections import Counter
+from datetime import datetime
+
+from raffle_draw import RAFFLE_ENTRIES, normalize_email, raffle_entries
+
+TIER_LABELS = {'gpt-5': 'Hard (gpt-5)', 'gpt-4.1': 'Medium (gpt-4.1)', 'gpt-4.1-nano': 'Easy (gpt-4.1-nano)'}
+
+
+class TierStats:
+    __slots__ = ('wins', 'draws', 'losses', 'scores', 'winners')
+
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.scores = Counter()  # user score -> quizzes
+        self.winners = set()     # distinct emails that beat this tier
+
+    @property
+    def played(self):
+        return self.wins + self.draws + self.losses
+
+    def add(self, email, user_score, ai_score):
+        self.scores[user_score] += 1
+        if user_score > ai_score:
+            self.wins += 1
+            self.winners.add(email)
+        elif user_score == ai_score:
+            self.draws += 1
+        else:
+            self.losses += 1
+
+    def summary(self):
+        played = self.played
+        return {'played': played, 'wins': self.wins, 'draws': self.draws, 'losses': self.losses,
+                'people_beat_ai': len(self.winners),
+                'win_rate': round(self.wins / played, 4) if played else 0.0,
+                'score_distribution': dict(sorted(self.scores.items()))}
+
+
+class LeaderboardStats:
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.version = 0
+        self._lock = threading.Lock()
+        self._tiers = {}      # model -> TierStats
+        self._daily = {}      # (YYYY-MM-DD, model) -> TierStats
+        self._best = {}       # email -> best ranking key
+        self._top = []        # [(key, email, name, user_score, ai_score, model)], best first
+        self._qualified = set()
+        self.qualifying_results = 0
+        self._seq = 0
+        self._rendered = (None, '')
+        self._results_offset = 0     # bytes of the results file replayed so far
+        self._results_columns = None
+        self._stop = threading.Event()
+
+    def record(self, name, email, user_score, ai_score, ai_model, timestamp=None):
+        email = normalize_email(email)
+        day = (timestamp or datetime.now().strftime("%Y-%m-%d"))[:10]
+        with self._lock:
+            self._seq += 1
+            self._tier(self._tiers, ai_model).add(email, user_score, ai_score)
+            self._tier(self._daily, (day, ai_model)).add(email, user_score, ai_score)
+            if raffle_entries(user_score, ai_score, ai_model):
+                self.qualifying_results += 1
+                self._qualified.add(email)
+            # Rank by score, then tier difficulty, then margin over the AI, then who got there first.
+            key = (user_score, RAFFLE_ENTRIES.get(ai_model, 0), user_score - ai_score, -self._seq)
+            if key > self._best.get(email, (float('-inf'),)):
+                self._best[email] = key
+                if len(self._top) < self.top_n or key > self._top[-1][0]:
+                    entry = (key, email, name, user_score, ai_score, ai_model)
+                    self._top = sorted([e for e in self._top if e[1] != email] + [entry], reverse=True)[:self.top_n]
+            self.version += 1
+
+    @staticmethod
+    def _tier(table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = TierStats()
+        return stats
+
+    def load_results(self, path):
+        """Replay rows appended to a results file since the last call. Returns the number of rows loaded."""
+        loaded = 0
+        try:
+            with open(path, 'rb') as f:
+                f.seek(self._results_offset)
+                tail = b''
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    chunk = tail + chunk
+                    end = chunk.rfind(b'\n') + 1  # only complete lines; a row being written is picked up next time
+                    tail = chunk[end:]
+                    if end:
+                        loaded += self._replay(chunk[:end].decode('utf-8'))
+                        self._results_offset += end
+        except FileNotFoundError:
+            pass
+        return loaded
+
+    def _replay(self, text):
+        loaded = 0
+        rows = csv.reader(io.StringIO(text, newline=''))
+        if self._results_columns is None:
+            self._results_columns = next(rows, None)
+        for values in rows:
+            row = dict(zip(self._results_columns, values))
+            try:
+                user_score, ai_score = int(row['UserScore']), int(row['AIScore'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.record(row.get('Name', ''), row.get('Email'), user_score, ai_score,
+                        row.get('AIModel'), row.get('Timestamp'))
+            loaded += 1
+        return loaded
+
+    def follow(self, path, interval=1.0):
+        """Tail the results file every ``interval`` seconds in a daemon thread."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.load_results(path)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Error reading results for the leaderboard: {e}")
+
+        threading.Thread(target=run, name="leaderboard-follow", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self, day=None):
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            return {
+                'tiers': {model: stats.summary() for model, stats in self._tiers.items()},
+                'today': {model: stats.summary() for (d, model), stats in self._daily.items() if d == day},
+                'top_players': [{'name': e[2], 'user_score': e[3], 'ai_score': e[4], 'ai_model': e[5]}
+                                for e in self._top],
+                'raffle_qualified_people': len(self._qualified),
+                'raffle_qualifying_results': self.qualifying_results,
+            }
+
+    def render_html(self):
+        """HTML for the leaderboard view; rebuilt only after new results arrive."""
+        # Keyed on the day too, so "today" rolls over at midnight even without new results.
+        current = (self.version, datetime.now().strftime("%Y-%m-%d"))
+        cache_key, cached = self._rendered
+        if cache_key == current:
+            return cached
+        snap = self.snapshot(current[1])
+        rows = ''.join(
+            f'<tr><td>{rank}</td><td>{html.escape(p["name"])}</td><td>{p["user_score"]} - {p["ai_score"]}</td>'
+            f'<td>{html.escape(TIER_LABELS.get(p["ai_model"], str(p["ai_model"])))}</td></tr>'
+            for rank, p in enumerate(snap['top_players'], 1))
+        tiers = ''.join(
+            f'<tr><td>{html.escape(TIER_LABELS.get(model, str(model)))}</td><td>{t["played"]}</td><td>{t["wins"]}</td>'
+            f'<td>{t["draws"]}</td><td>{t["losses"]}</td><td>{today.get("people_beat_ai", 0)}</td></tr>'
+            for model, t in sorted(snap['tiers'].items(), key=lambda kv: -RAFFLE_ENTRIES.get(kv[0], 0))
+            for today in [snap['today'].get(model, {})])
+        rendered = (
+            '<div id="leaderboard">'
+            '<table class="leaderboard-table"><tr><th>#</th><th>Player</th><th>Score</th><th>Tier</th></tr>'
+            f'{rows or "<tr><td colspan=4>No finished quizzes yet.</td></tr>"}</table>'
+            '<table class="leaderboard-table"><tr><th>Tier</th><th>Played</th><th>Wins</th><th>Draws</th>'
+            f'<th>Losses</th><th>Beat the AI today</th></tr>{tiers}</table>'
+            f'<div class="leaderboard-footer">{snap["raffle_qualified_people"]} people qualified for the raffle draw</div>'
+            '</div>'
+        )
+        self._rendered = (current, rendered)
+        return rendered
@@ -0,0 +1,196 @@
+"""In-process handler metrics with a local Prometheus/JSON endpoint.
+
+``Metrics.timed(name)`` wraps a handler to record a latency histogram, call
+count and error count; ``gauge`` registers a callable evaluated only when the
+endpoint is scraped. The endpoint is a small stdlib HTTP server bound to
+localhost on its own port, so it is never exposed through the Gradio share link.
+
+An optional sampling profiler (``SamplingProfiler``) periodically snapshots the
+stacks of all threads and serves them as collapsed stacks, ready for
+flamegraph.pl / speedscope. It costs nothing unless started.
+"""
+import bisect
+import functools
+import json
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-th quantile (Prometheus-style estimate)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    def __init__(self, namespace="quiz"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._calls = Counter()
+        self._errors = Counter()
+        self._gauges = {}
+
+    def timed(self, name):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                error = False
+                try:
+                    return fn(*args, **kwargs)
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    self.observe(name, time.perf_counter() - start, error)
+            return wrapper
+        return decorator
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            histogram = self._latency.get(name)
+            if histogram is None:
+                histogram = self._latency[name] = Histogram()
+            histogram.observe(seconds)
+            self._calls[name] += 1
+            if error:
+                self._errors[name] += 1
+
+    def gauge(self, name, help_text, fn):
+        self._gauges[name] = (help_text, fn)
+
+    def snapshot(self):
+        with self._lock:
+            handlers = {
+                name: {
+                    'calls': self._calls[name], 'errors': self._errors[name],
+                    'mean_ms': round(h.sum / h.count * 1000, 3) if h.count else 0.0,
+                    'p50_ms_le': h.quantile(0.5) * 1000, 'p95_ms_le': h.quantile(0.95) * 1000,
+                    'p99_ms_le': h.quantile(0.99) * 1000,
+                }
+                for name, h in self._latency.items()
+            }
+        return {'handlers': handlers, 'gauges': {name: _read_gauge(fn) for name, (_, fn) in self._gauges.items()}}
+
+    def prometheus(self):
+        ns = self.namespace
+        lines = [f"# HELP {ns}_handler_seconds Handler latency in seconds.", f"# TYPE {ns}_handler_seconds histogram"]
+        with self._lock:
+            latency = {name: (list(h.counts), h.sum, h.count, h.buckets) for name, h in self._latency.items()}
+            calls, errors = dict(self._calls), dict(self._errors)
+        for name, (counts, total, count, buckets) in sorted(latency.items()):
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f'{ns}_handler_seconds_bucket{{handler="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{ns}_handler_seconds_bucket{{handler="{name}",le="+Inf"}} {count}')
+            lines.append(f'{ns}_handler_seconds_sum{{handler="{name}"}} {total}')
+            lines.append(f'{ns}_handler_seconds_count{{handler="{name}"}} {count}')
+        for metric, values in (("calls", calls), ("errors", errors)):
+            lines += [f"# HELP {ns}_handler_{metric}_total Handler {metric}.", f"# TYPE {ns}_handler_{metric}_total counter"]
+            lines += [f'{ns}_handler_{metric}_total{{handler="{name}"}} {values.get(name, 0)}' for name in sorted(latency)]
+        for name, (help_text, fn) in sorted(self._gauges.items()):
+            value = _read_gauge(fn)
+            if value is not None:
+                lines += [f"# HELP {ns}_{name} {help_text}", f"# TYPE {ns}_{name} gauge", f"{ns}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1", profiler=None):
+        """Start the local endpoint in a daemon thread: /metrics, /metrics.json and /profile."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body, content_type = metrics.prometheus(), "text/plain; version=0.0.4"
+                elif path == "/metrics.json":
+                    body, content_type = json.dumps(metrics.snapshot(), indent=2), "application/json"
+                elif path == "/profile" and profiler is not None:
+                    body, content_type = profiler.collapsed(), "text/plain"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+        return server
+
+
+def _read_gauge(fn):
+    try:
+        return fn()
+    except Exception:
+        return None
+
+
+class SamplingProfiler:
+    """Samples every thread's stack ``hz`` times a second and counts collapsed stacks."""
+
+    def __init__(self, hz=100, max_depth=40):
+        self.interval = 1.0 / hz
+        self.max_depth = max_depth
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            samples = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = traceback.extract_stack(frame, limit=self.max_depth)
+                samples.append(";".join(f"{f.name} ({f.filename.rsplit('/', 1)[-1]}:{f.lineno})" for f in stack))
+            with self._lock:
+                self._stacks.update(samples)
+
+    def collapsed(self):
+        with self._lock:
+            return "".join(f"{stack} {n}\n" for stack, n in self._stacks.most_common())
@@ -0,0 +1,212 @@
+"""Registry of everyone who has played, for repeat-play checks at start_quiz.
+
+Participants are keyed by normalized email, with normalized name + company as a
+secondary key to spot people replaying under another address. The registry is a
+SQLite table (WAL, shared by worker processes) fronted by an in-memory cache:
+
+* ``load`` streams the table into the cache at startup, in batches.
+* ``history`` answers from the cache in O(1); on a miss it does one primary-key
+  lookup, which also catches entrants another worker added since startup. With
+  ``shared=True`` (several workers) or ``verify=True`` (blocking repeats) it
+  looks the email up even on a hit, since other workers may have moved on.
+* ``record_start`` / ``record_completion`` update the cache immediately and
+  queue the upsert for the background writer, so handlers never wait on disk.
+
+``import_results`` seeds the registry from an existing results CSV (once per
+file), so events that ran before the registry existed are covered too.
+
+    python participant_registry.py quiz_results.csv --db quiz_participants.db
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from raffle_draw import normalize_email
+from results_sink import BatchSink
+
+LOAD_BATCH = 10000
+
+_UPSERT = """
+INSERT INTO participants (email, name_key, company_key, name, company, starts, completions, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(email) DO UPDATE SET
+    name_key = excluded.name_key, company_key = excluded.company_key, name = excluded.name,
+    company = excluded.company, starts = starts + excluded.starts,
+    completions = completions + excluded.completions, last_seen = excluded.last_seen
+"""
+
+
+def person_key(name, company):
+    return (' '.join((name or '').casefold().split()), ' '.join((company or '').casefold().split()))
+
+
+class ParticipantRegistry(BatchSink):
+    def __init__(self, path, shared=False, **kwargs):
+        self.path = path
+        self.shared = shared  # other processes write to the same table
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        self._by_email = {}   # email -> [starts, completions]
+        self._by_person = {}  # (name key, company key) -> set of emails
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS participants (email TEXT PRIMARY KEY, name_key TEXT, "
+                       "company_key TEXT, name TEXT, company TEXT, starts INTEGER NOT NULL DEFAULT 0, "
+                       "completions INTEGER NOT NULL DEFAULT 0, first_seen TEXT, last_seen TEXT)")
+            db.execute("CREATE INDEX IF NOT EXISTS participants_person ON participants (name_key, company_key)")
+            db.execute("CREATE TABLE IF NOT EXISTS registry_meta (key TEXT PRIMARY KEY, value TEXT)")
+        super().__init__(name="participant-registry", **kwargs)
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def load(self):
+        """Fill the cache from the table, in batches; returns the number of participants loaded."""
+        cursor = self._connection().execute(
+            "SELECT email, name_key, company_key, starts, completions FROM participants")
+        loaded = 0
+        while True:
+            rows = cursor.fetchmany(LOAD_BATCH)
+            if not rows:
+                return loaded
+            with self._cache_lock:
+                for email, name_key, company_key, starts, completions in rows:
+                    self._cache(email, (name_key or '', company_key or ''), starts, completions)
+            loaded += len(rows)
+
+    def _cache(self, email, person, starts, completions):
+        counts = self._by_email.get(email)
+        if counts is None:
+            self._by_email[email] = [starts, completions]
+        else:
+            counts[0], counts[1] = max(counts[0], starts), max(counts[1], completions)
+        if any(person):
+            self._by_person.setdefault(person, set()).add(email)
+
+    def history(self, email, name='', company='', verify=False):
+        """(starts, completions, other emails seen with the same name and company).
+
+        ``verify`` re-reads the table when the cache shows no completions, for
+        callers that turn entrants away on the answer.
+        """
+        email = normalize_email(email)
+        person = person_key(name, company)
+        with self._cache_lock:
+            counts = self._by_email.get(email)
+            lookup = counts is None or self.shared or (verify and not counts[1])
+        if lookup:
+            db = self._connection()
+            row = db.execute("SELECT starts, completions FROM participants WHERE email = ?", (email,)).fetchone()
+            people = db.execute("SELECT email FROM participants WHERE name_key = ? AND company_key = ?",
+                                person).fetchall() if self.shared and any(person) else ()
+            with self._cache_lock:
+                if row is not None:
+                    self._cache(email, person, *row)
+                for other, in people:
+                    self._by_person.setdefault(person, set()).add(other)
+        with self._cache_lock:
+            starts, completions = self._by_email.get(email, (0, 0))
+            namesakes = self._by_person.get(person, ()) if any(person) else ()
+            others = tuple(e for e in namesakes if e != email)
+        return starts, completions, others
+
+    def record_start(self, email, name, company):
+        self._record(email, name, company, 1, 0)
+
+    def record_completion(self, email, name, company):
+        self._record(email, name, company, 0, 1)
+
+    def _record(self, email, name, company, starts, completions):
+        email = normalize_email(email)
+        person = person_key(name, company)
+        with self._cache_lock:
+            counts = self._by_email.setdefault(email, [0, 0])
+            counts[0] += starts
+            counts[1] += completions
+            if any(person):
+                self._by_person.setdefault(person, set()).add(email)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.submit((email, person[0], person[1], (name or '').strip(), (company or '').strip(),
+                     starts, completions, now, now))
+
+    def _write_batch(self, records):
+        db = self._connection()
+        try:
+            with db:
+                db.execute("BEGIN IMMEDIATE")
+                db.executemany(_UPSERT, records)
+        except sqlite3.OperationalError as e:  # e.g. locked past the timeout: keep the batch for a retry
+            # (anything else, e.g. a value SQLite can't bind, is isolated and dropped by BatchSink)
+            raise OSError(str(e)) from e
+
+    def import_results(self, path):
+        """Seed completions from a results CSV, once per file; returns the number of participants imported.
+
+        A missing file counts as imported (with nobody in it): rows written after
+        this call are recorded live, so importing them on a later start would count
+        everyone twice.
+        """
+        key = f"imported:{os.path.abspath(path)}"
+        db = self._connection()
+        if db.execute("SELECT 1 FROM registry_meta WHERE key = ?", (key,)).fetchone():
+            return 0
+        people = {}
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    email = normalize_email(row.get('Email'))
+                    if not email:
+                        continue
+                    entry = people.get(email)
+                    if entry is None:
+                        person = person_key(row.get('Name'), row.get('Company'))
+                        timestamp = row.get('Timestamp') or ''
+                        entry = people[email] = [email, person[0], person[1], (row.get('Name') or '').strip(),
+                                                 (row.get('Company') or '').strip(), 0, 0, timestamp, timestamp]
+                    entry[5] += 1
+                    entry[6] += 1
+                    entry[8] = row.get('Timestamp') or entry[8]
+        except FileNotFoundError:
+            pass  # a fresh deployment: mark it imported anyway, since every later row is recorded live
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            if db.execute("SELECT 1 FROM registry_meta WHERE key = ?", (key,)).fetchone():
+                return 0  # another worker got there first
+            db.executemany(_UPSERT, people.values())
+            db.execute("INSERT INTO registry_meta VALUES (?, ?)", (key, datetime.now().isoformat(timespec='seconds')))
+        with self._cache_lock:
+            for email, name_key, company_key, _, _, starts, completions, _, _ in people.values():
+                counts = self._by_email.setdefault(email, [0, 0])
+                counts[0] += starts
+                counts[1] += completions
+                if name_key or company_key:
+                    self._by_person.setdefault((name_key, company_key), set()).add(email)
+        return len(people)
+
+    def __len__(self):
+        with self._cache_lock:
+            return len(self._by_email)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('results', nargs='+', help='quiz_results.csv files to seed the registry from')
+    parser.add_argument('--db', default='quiz_participants.db')
+    args = parser.parse_args()
+
+    registry = ParticipantRegistry(args.db)
+    for path in args.results:
+        print(f"{path}: {registry.import_results(path)} participants imported")
+    registry.close()
+    print(f"{registry.load()} participants in {args.db}")
+
+
+if __name__ == '__main__':
+    main()
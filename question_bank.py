@@ -0,0 +1,622 @@
+"""Compact, column-oriented question bank.
+
+Questions are stored as columns instead of one dict per record: text fields live
+in packed UTF-8 string tables, answer keys and per-model answers in small int
+arrays, and categorical fields (subject, topic, choice type) as integer codes
+with precomputed row indexes. Rows are addressed by position; ``row(id)`` maps
+a question id to its position in O(1).
+
+``load_bank`` keeps a binary cache next to the JSONL source: the same columns
+written as raw arrays and string tables, memory-mapped on the next start so a
+warm load does no JSON parsing. The cache is reused while the source's size and
+mtime match, or when its SHA-256 still matches after a touch.
+"""
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+from array import array
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process writes only
+    fcntl = None
+
+OPTION_KEYS = ('opa', 'opb', 'opc', 'opd')
+CATEGORY_FIELDS = ('subject_name', 'topic_name', 'choice_type')
+UNKNOWN_CATEGORY = 'Unknown'  # stored for a missing (null) category value
+# Every other integer field on a record is treated as a model's chosen option.
+NON_MODEL_FIELDS = frozenset(('id', 'question', *OPTION_KEYS, 'cop', 'exp', *CATEGORY_FIELDS,
+                              'length_of_question', 'length_max_ans'))
+NO_ANSWER = -1
+MAX_REPORTED_ERRORS = 5
+
+CACHE_SUFFIX = '.qbank'
+CACHE_MAGIC = b'QBANK001'
+CACHE_HEADER = struct.Struct('<8sQQ32sQ')  # magic, source mtime_ns, source size, source sha256, metadata length
+UNKNOWN_SHA256 = bytes(32)  # caches extended in place don't hash the whole source again
+
+
+class StringTable:
+    """Immutable list of strings packed into one UTF-8 buffer plus offsets."""
+
+    __slots__ = ('_blob', '_offsets')
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        builder = StringTableBuilder()
+        for s in strings:
+            builder.append(s)
+        return builder.build()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets)
+
+
+class StringTableBuilder:
+    __slots__ = ('_blob', '_offsets')
+
+    def __init__(self):
+        self._blob = bytearray()
+        self._offsets = array('Q', [0])
+
+    def append(self, s):
+        self._blob += (s or '').encode('utf-8')
+        self._offsets.append(len(self._blob))
+
+    def build(self):
+        return StringTable(bytes(self._blob), self._offsets)
+
+
+class CategoryColumn:
+    """Integer-coded categorical column with a row index per value."""
+
+    __slots__ = ('names', 'codes', '_code_of', '_rows')
+
+    def __init__(self, names, codes, extends=None):
+        self.names = list(names)
+        self.codes = codes
+        self._code_of = {name: code for code, name in enumerate(self.names)}
+        # With ``extends`` (the same column for the leading rows), only the rows after it are indexed.
+        buckets = [array('I', rows) for rows in extends._rows] if extends is not None else []
+        buckets += [array('I') for _ in range(len(self.names) - len(buckets))]
+        first = len(extends.codes) if extends is not None else 0
+        for row in range(first, len(codes)):
+            buckets[codes[row]].append(row)
+        self._rows = buckets
+
+    def __getitem__(self, row):
+        return self.names[self.codes[row]]
+
+    def rows_for(self, value):
+        code = self._code_of.get(value)
+        return self._rows[code] if code is not None else array('I')
+
+    def counts(self):
+        return {name: len(rows) for name, rows in zip(self.names, self._rows)}
+
+
+class CategoryColumnBuilder:
+    __slots__ = ('_names', '_code_of', '_codes')
+
+    def __init__(self, names=()):
+        self._names = list(names)  # codes continue those of the column these rows will follow
+        self._code_of = {name: code for code, name in enumerate(self._names)}
+        self._codes = array('I')
+
+    def append(self, value):
+        value = value if value is not None else UNKNOWN_CATEGORY
+        code = self._code_of.get(value)
+        if code is None:
+            code = self._code_of[value] = len(self._names)
+            self._names.append(value)
+        self._codes.append(code)
+
+    def build(self):
+        return CategoryColumn(self._names, self._codes)
+
+
+class QuestionBank:
+    def __init__(self, ids, questions, options, explanations, correct, model_answers, categories, row_of=None):
+        self.ids = ids                      # StringTable
+        self.questions = questions          # StringTable
+        self.options = options              # StringTable, 4 entries per row
+        self.explanations = explanations    # StringTable
+        self.correct = correct              # array('b') of 0-3
+        self.model_answers = model_answers  # model name -> array('b'), NO_ANSWER when missing
+        self.categories = categories        # field name -> CategoryColumn
+        self._row_of = row_of if row_of is not None else {qid: row for row, qid in enumerate(ids)}
+        self._buffer = None  # mmap backing the columns when loaded from a cache
+        self.source_bytes = 0  # how much of the source file this bank covers
+        self.extends_rows = 0  # leading rows shared with the bank this one was extended from
+
+    @classmethod
+    def from_records(cls, records):
+        builder = QuestionBankBuilder()
+        for record in records:
+            builder.append(record)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.correct)
+
+    def __bool__(self):
+        return len(self.correct) > 0
+
+    @property
+    def models(self):
+        return tuple(self.model_answers)
+
+    def row(self, question_id):
+        return self._row_of[question_id]
+
+    def __contains__(self, question_id):
+        return question_id in self._row_of
+
+    def question(self, row):
+        return self.questions[row]
+
+    def option_list(self, row):
+        base = row * 4
+        return [self.options[base + k] for k in range(4)]
+
+    def answer(self, row, model):
+        answers = self.model_answers.get(model)
+        return answers[row] if answers is not None else NO_ANSWER
+
+    def record(self, row):
+        """Rebuild the original dict for one row (debugging / export only)."""
+        record = {'id': self.ids[row], 'question': self.questions[row]}
+        record.update(zip(OPTION_KEYS, self.option_list(row)))
+        record['cop'] = self.correct[row]
+        record['exp'] = self.explanations[row]
+        for field, column in self.categories.items():
+            record[field] = column[row]
+        for model, answers in self.model_answers.items():
+            record[model] = answers[row]
+        return record
+
+    def rows_where(self, **filters):
+        """Ascending rows matching every filter; a filter value may be one name or a collection of names.
+
+        Uses the columns' row indexes directly: one filter value is its index as
+        is (read-only), several filters are intersected as sorted arrays.
+        """
+        matched = None
+        for field, wanted in filters.items():
+            rows = _rows_for_any(self.categories[field], wanted)
+            matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+            if not len(matched):
+                break
+        return range(len(self)) if matched is None else matched
+
+    def sample(self, n, filters=None, rng=random):
+        """Return ``n`` distinct rows (fewer if not enough match) chosen uniformly at random."""
+        pool = self.rows_where(**filters) if filters else range(len(self))
+        return [int(pool[i]) for i in rng.sample(range(len(pool)), min(n, len(pool)))]
+
+
+def _rows_for_any(column, wanted):
+    values = [wanted] if isinstance(wanted, str) else list(wanted)
+    indexes = [np.frombuffer(column.rows_for(value), dtype=np.uint32) for value in values]
+    if len(indexes) == 1:
+        rows = indexes[0]
+        rows.flags.writeable = False  # a view of the column's own index
+        return rows
+    # Each row has one value, so the indexes are disjoint: their union is just the sorted concatenation.
+    return np.sort(np.concatenate(indexes)) if indexes else np.zeros(0, dtype=np.uint32)
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def validate_record(record, models):
+    if not isinstance(record, dict):
+        raise InvalidRecord("record is not a JSON object")
+    if record.get('id') in (None, ''):
+        raise InvalidRecord("missing id")
+    if not isinstance(record.get('question'), str) or not record['question'].strip():
+        raise InvalidRecord("missing question text")
+    missing = [key for key in OPTION_KEYS if record.get(key) is None]
+    if missing:
+        raise InvalidRecord(f"expected four options, missing {', '.join(missing)}")
+    cop = record.get('cop')
+    if not isinstance(cop, int) or isinstance(cop, bool) or not 0 <= cop < len(OPTION_KEYS):
+        raise InvalidRecord(f"cop {cop!r} is not an option index 0-3")
+    missing = [model for model in models if model not in record]
+    if missing:
+        raise InvalidRecord(f"missing model fields {', '.join(missing)}")
+
+
+class QuestionBankBuilder:
+    """Accumulates validated records into columns.
+
+    With ``extends``, the rows are the ones to follow that bank: they share its
+    models and category codes, and ids already in it count as duplicates. The
+    bank itself is not copied; ``build`` returns only the new rows.
+    """
+
+    def __init__(self, models=None, extends=None):
+        self._extends = extends
+        if extends is not None:
+            models = extends.models
+        self._models = list(models) if models is not None else None
+        self._ids = StringTableBuilder()
+        self._questions = StringTableBuilder()
+        self._options = StringTableBuilder()
+        self._explanations = StringTableBuilder()
+        self._correct = array('b')
+        self._model_answers = {}
+        self._categories = {field: CategoryColumnBuilder(extends.categories[field].names if extends is not None else ())
+                            for field in CATEGORY_FIELDS}
+        self._seen_ids = set()
+
+    def __len__(self):
+        return len(self._correct)
+
+    def append(self, record):
+        """Add one record; raises InvalidRecord (leaving the builder unchanged) if it is unusable."""
+        if self._models is None and isinstance(record, dict):
+            self._models = [k for k, v in record.items() if k not in NON_MODEL_FIELDS and isinstance(v, int)]
+        validate_record(record, self._models or ())
+        question_id = str(record['id'])
+        if question_id in self._seen_ids or (self._extends is not None and question_id in self._extends):
+            raise InvalidRecord(f"duplicate id {question_id}")
+        self._seen_ids.add(question_id)
+        if not self._model_answers:
+            self._model_answers = {model: array('b') for model in self._models}
+        self._ids.append(question_id)
+        self._questions.append(record['question'])
+        for key in OPTION_KEYS:
+            self._options.append(str(record[key]))
+        self._explanations.append(record.get('exp'))
+        self._correct.append(int(record['cop']))
+        for model, answers in self._model_answers.items():
+            value = record.get(model)
+            answers.append(value if isinstance(value, int) and 0 <= value < 4 else NO_ANSWER)
+        for field, column in self._categories.items():
+            column.append(record.get(field))
+
+    def build(self):
+        return QuestionBank(
+            ids=self._ids.build(), questions=self._questions.build(), options=self._options.build(),
+            explanations=self._explanations.build(), correct=self._correct,
+            model_answers=self._model_answers,
+            categories={field: column.build() for field, column in self._categories.items()},
+        )
+
+
+def read_jsonl(file_path):
+    with open(file_path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class JsonlReader:
+    """Streams records from byte ``offset`` to ``end`` of a JSONL file, one line at a time.
+
+    Only complete lines are consumed; a trailing line without a newline is taken
+    only if it already parses, so a half-written append is left for the next read.
+    ``offset`` always points just past the last consumed line.
+    """
+
+    def __init__(self, path, offset=0, end=None, digest=None):
+        self.path = path
+        self.offset = offset
+        self.end = end
+        self.digest = digest
+
+    def __iter__(self):
+        """Yield ``(byte_offset, record_or_exception)`` for each non-blank line."""
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while self.end is None or self.offset < self.end:
+                line = f.readline() if self.end is None else f.readline(self.end - self.offset)
+                if not line:
+                    break
+                start = self.offset
+                complete = line.endswith(b'\n')
+                try:
+                    item = json.loads(line) if line.strip() else None
+                except ValueError as e:
+                    if not complete:
+                        break
+                    item = e
+                self.offset += len(line)
+                if self.digest is not None:
+                    self.digest.update(line)
+                if item is not None:
+                    yield start, item
+
+
+def ingest(builder, reader):
+    """Append every valid record from ``reader``; returns (accepted, rejected) and logs the first errors."""
+    accepted = rejected = 0
+    for position, item in reader:
+        try:
+            if isinstance(item, Exception):
+                raise item
+            builder.append(item)
+            accepted += 1
+        except ValueError as e:  # InvalidRecord or JSON decode error
+            rejected += 1
+            if rejected <= MAX_REPORTED_ERRORS:
+                print(f"Skipping invalid question at byte {position} of {reader.path}: {e}")
+    if rejected > MAX_REPORTED_ERRORS:
+        print(f"Skipped {rejected} invalid questions in {reader.path}.")
+    return accepted, rejected
+
+
+# --- Binary cache ---
+def load_bank(source_path, cache_path=None):
+    """Load ``source_path`` through its binary cache, rebuilding the cache when the source changed."""
+    cache_path = cache_path or source_path + CACHE_SUFFIX
+    st = os.stat(source_path)
+    cached = _open_cache(cache_path)
+    if cached is not None:
+        header, bank = cached
+        bank.source_bytes = header['size']
+        if (header['mtime_ns'], header['size']) == (st.st_mtime_ns, st.st_size):
+            return bank
+        if (header['size'] == st.st_size and header['sha256'] != UNKNOWN_SHA256
+                and header['sha256'] == _file_sha256(source_path)):
+            _touch_cache(cache_path, st.st_mtime_ns)
+            return bank
+    digest = hashlib.sha256()
+    reader = JsonlReader(source_path, end=st.st_size, digest=digest)
+    builder = QuestionBankBuilder()
+    ingest(builder, reader)
+    bank = builder.build()
+    bank.source_bytes = reader.offset
+    if reader.offset != st.st_size:
+        return bank  # caught a half-written line; don't cache a partial file
+    try:
+        save_cache(bank, cache_path, st.st_mtime_ns, st.st_size, digest.digest())
+    except OSError as e:
+        print(f"Warning: could not write question bank cache {cache_path}: {e}")
+    return bank
+
+
+def extend_bank(base, source_path, cache_path=None):
+    """``base`` plus the lines appended to ``source_path`` since it was read; returns (bank, accepted, rejected).
+
+    Only the new lines are parsed. The cache is rewritten as base + new rows
+    (the base columns go straight from their buffers to the file) and mapped
+    again, so the result is shared through the page cache like a cold load. A
+    worker that finds the cache already extended by another one just maps it.
+    ``bank`` is None while the last line is still being written.
+    """
+    cache_path = cache_path or source_path + CACHE_SUFFIX
+    with _cache_lock(cache_path):
+        st = os.stat(source_path)
+        if _cache_stamp(cache_path) == (st.st_mtime_ns, st.st_size):
+            cached = _open_cache(cache_path, extends=base)
+            if cached is not None and cached[1].extends_rows:
+                bank = cached[1]
+                bank.source_bytes = st.st_size
+                return bank, len(bank) - len(base), 0
+        reader = JsonlReader(source_path, offset=base.source_bytes, end=st.st_size)
+        builder = QuestionBankBuilder(extends=base)
+        accepted, rejected = ingest(builder, reader)
+        if reader.offset != st.st_size:
+            return None, 0, 0  # a half-written line: take the batch on the next poll
+        if not accepted:
+            base.source_bytes = reader.offset  # nothing usable; don't re-read those bytes
+            return base, 0, rejected
+        tail = builder.build()
+        try:
+            _write_cache(cache_path, (base, tail), st.st_mtime_ns, st.st_size, UNKNOWN_SHA256)
+            cached = _open_cache(cache_path, extends=base)
+        except OSError as e:
+            print(f"Warning: could not extend question bank cache {cache_path}: {e}")
+            cached = None
+        bank = cached[1] if cached is not None else _concat(base, tail)
+        bank.source_bytes = st.st_size
+        return bank, accepted, rejected
+
+
+@contextmanager
+def _cache_lock(cache_path):
+    """Serializes cache rewrites between worker processes."""
+    try:
+        lock_file = open(cache_path + '.lock', 'a')
+    except OSError:  # e.g. a read-only directory, where the cache can't be rewritten either
+        lock_file = None
+    if lock_file is None or fcntl is None:
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file is closed
+        yield
+
+
+def _concat(base, tail):
+    """In-memory base + tail, for when the cache can't be written."""
+    def joined(typecode, *buffers):
+        column = array(typecode)
+        for buffer in buffers:
+            column.frombytes(_raw(buffer))
+        return column
+
+    def table(name):
+        first, second = getattr(base, name), getattr(tail, name)
+        shift = len(_raw(first._blob))
+        offsets = joined('Q', first._offsets)
+        offsets.extend(o + shift for o in second._offsets[1:])
+        return StringTable(bytes(_raw(first._blob)) + bytes(_raw(second._blob)), offsets)
+
+    row_of = dict(base._row_of)
+    row_of.update((qid, len(base) + row) for qid, row in tail._row_of.items())
+    bank = QuestionBank(
+        ids=table('ids'), questions=table('questions'), options=table('options'), explanations=table('explanations'),
+        correct=joined('b', base.correct, tail.correct),
+        model_answers={model: joined('b', base.model_answers[model], answers)
+                       for model, answers in tail.model_answers.items()},
+        categories={field: CategoryColumn(column.names, joined('I', base.categories[field].codes, column.codes),
+                                          base.categories[field])
+                    for field, column in tail.categories.items()},
+        row_of=row_of,
+    )
+    bank.extends_rows = len(base)
+    return bank
+
+
+def save_cache(bank, cache_path, mtime_ns, size, sha256):
+    _write_cache(cache_path, (bank,), mtime_ns, size, sha256)
+
+
+def _write_cache(cache_path, parts, mtime_ns, size, sha256):
+    """Write the banks ``parts`` as one cache, rows in order. Columns are written from their buffers as they
+    are (e.g. straight from a mapped cache), so nothing bank-sized is copied in memory."""
+    last = parts[-1]  # its category names extend those of the parts before it
+    sections, columns, offset = {}, [], 0
+
+    def add(name, buffers, typecode):
+        nonlocal offset
+        buffers = [_raw(buffer) for buffer in buffers]
+        length = sum(len(buffer) for buffer in buffers)
+        sections[name] = [offset, length, typecode]
+        columns.append((buffers, -length % 8))
+        offset += length + columns[-1][1]
+
+    for name in ('ids', 'questions', 'options', 'explanations'):
+        blobs, offsets, shift = [], [], 0
+        for i, part in enumerate(parts):
+            table = getattr(part, name)
+            blobs.append(table._blob)
+            # Later parts' offsets continue from the blobs before them (they are small: only new rows).
+            offsets.append(table._offsets if i == 0 else array('Q', (o + shift for o in table._offsets[1:])))
+            shift += len(_raw(table._blob))
+        add(name + '.blob', blobs, 'B')
+        add(name + '.offsets', offsets, 'Q')
+    add('correct', [part.correct for part in parts], 'b')
+    for model in last.model_answers:
+        add('model.' + model, [part.model_answers[model] for part in parts], 'b')
+    for field in last.categories:
+        add('category.' + field, [part.categories[field].codes for part in parts], 'I')
+    meta = json.dumps({
+        'models': list(last.model_answers), 'sections': sections,
+        'categories': {field: column.names for field, column in last.categories.items()},
+    }).encode('utf-8')
+    meta += b' ' * (-(CACHE_HEADER.size + len(meta)) % 8)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, mtime_ns, size, sha256, len(meta)))
+        f.write(meta)
+        for buffers, padding in columns:
+            for buffer in buffers:
+                f.write(buffer)
+            f.write(b'\0' * padding)
+    os.replace(tmp_path, cache_path)  # atomic: readers see the old or the new file, never a partial one
+
+
+def _open_cache(cache_path, extends=None):
+    """(header, bank) for a valid cache, else None. If the cache starts with ``extends``'s rows, its id index is reused."""
+    try:
+        with open(cache_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # ValueError: empty file
+        return None
+    view = memoryview(buffer)
+    try:
+        magic, mtime_ns, size, sha256, meta_len = CACHE_HEADER.unpack_from(view)
+        if magic != CACHE_MAGIC:
+            return None
+        meta = json.loads(bytes(view[CACHE_HEADER.size:CACHE_HEADER.size + meta_len]))
+    except (struct.error, ValueError):
+        return None
+    base = CACHE_HEADER.size + meta_len
+
+    def section(name, typecode, count=None):
+        start, length, stored_typecode = meta['sections'][name]
+        if stored_typecode != typecode or start < 0 or length < 0 or base + start + length > len(view):
+            raise ValueError(f"bad section {name}")
+        column = view[base + start:base + start + length].cast(typecode)  # TypeError if length isn't whole items
+        if count is not None and len(column) != count:
+            raise ValueError(f"section {name} has {len(column)} rows, expected {count}")
+        return column
+
+    def table(name, count):
+        offsets = section(name + '.offsets', 'Q', count + 1)
+        blob = section(name + '.blob', 'B')
+        if offsets[0] != 0 or offsets[-1] != len(blob):
+            raise ValueError(f"bad offsets for {name}")
+        return StringTable(blob, offsets)
+
+    # A truncated or foreign file must not become an empty or broken bank: any mismatch means "no cache".
+    try:
+        rows = len(section('ids.offsets', 'Q')) - 1
+        ids = table('ids', rows)
+        row_of = None
+        if extends and len(extends) <= rows and ids[len(extends) - 1] == extends.ids[len(extends) - 1]:
+            row_of = dict(extends._row_of)  # shares the id strings; only the new rows are decoded
+            row_of.update((ids[row], row) for row in range(len(extends), rows))
+        bank = QuestionBank(
+            ids=ids, questions=table('questions', rows), options=table('options', 4 * rows),
+            explanations=table('explanations', rows), correct=section('correct', 'b', rows),
+            model_answers={model: section('model.' + model, 'b', rows) for model in meta['models']},
+            categories={field: CategoryColumn(names, section('category.' + field, 'I', rows),
+                                              extends.categories[field] if row_of is not None else None)
+                        for field, names in meta['categories'].items()},
+            row_of=row_of,
+        )
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    if row_of is not None:
+        bank.extends_rows = len(extends)
+    bank._buffer = buffer  # keep the mapping alive as long as the bank
+    return {'mtime_ns': mtime_ns, 'size': size, 'sha256': sha256}, bank
+
+
+def _cache_stamp(cache_path):
+    """(source mtime_ns, source size) from a cache's header, or None."""
+    try:
+        with open(cache_path, 'rb') as f:
+            magic, mtime_ns, size, _, _ = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return (mtime_ns, size) if magic == CACHE_MAGIC else None
+
+
+def _touch_cache(cache_path, mtime_ns):
+    # Same content, new mtime: record it so the next start skips hashing again.
+    try:
+        with open(cache_path, 'r+b') as f:
+            f.seek(len(CACHE_MAGIC))
+            f.write(struct.pack('<Q', mtime_ns))
+    except OSError:
+        pass
+
+
+def _raw(buffer):
+    return memoryview(buffer).cast('B')
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
@@ -0,0 +1,99 @@
+"""Client-side quiz packs: one round trip to start a quiz, one to finish it.
+
+With pack mode on, ``start_quiz`` also sends the whole quiz as a JSON pack
+(questions, options and the obfuscated correct/AI answers). The answer buttons
+then run ``PACK_ANSWER_JS`` in the browser only: it renders the feedback, scores
+and next question locally and, after the last question, writes the chosen
+options to a hidden submission box whose change event makes the single scoring
+call. The server never trusts the browser's scores: ``score_submission``
+re-scores the submitted choices against the session's own question ids.
+
+The answers in a pack are XOR-masked with a per-pack nonce. That keeps them out
+of casual view (devtools, payload logs) but is not a secret from someone who
+reads the JavaScript; use the default per-click mode where that matters.
+"""
+import base64
+import json
+import secrets
+
+
+def build_pack(bank, rows, ai_model):
+    """JSON pack for the quiz rows: questions, option labels and masked answers."""
+    nonce = secrets.token_bytes(len(rows))
+    # Low two bits: correct option; the rest: AI option + 1 (0 when the AI gave no answer).
+    codes = bytes((bank.correct[row] | ((bank.answer(row, ai_model) + 1) << 2)) ^ mask
+                  for row, mask in zip(rows, nonce))
+    return json.dumps({
+        'questions': [{'text': bank.question(row), 'options': bank.option_list(row)} for row in rows],
+        'nonce': base64.b64encode(nonce).decode('ascii'),
+        'codes': base64.b64encode(codes).decode('ascii'),
+        'i': 0, 'choices': [], 'ms': [], 'user': 0, 'ai': 0, 'shown': None,
+    }, ensure_ascii=False)
+
+
+def parse_submission(submission, num_questions):
+    """(choices, response seconds) from the browser's submission JSON; raises ValueError if malformed."""
+    data = json.loads(submission)
+    choices, ms = data.get('choices'), data.get('ms') or []
+    if not isinstance(choices, list) or len(choices) != num_questions:
+        raise ValueError("wrong number of answers")
+    if any(type(c) is not int or not -1 <= c <= 3 for c in choices):
+        raise ValueError("invalid answer index")
+    seconds = [m / 1000 if isinstance(m, (int, float)) and m >= 0 else 0.0 for m in ms[:num_questions]]
+    return choices, seconds + [0.0] * (num_questions - len(seconds))
+
+
+def score_submission(bank, question_ids, ai_model, choices):
+    """Server-side scoring: [(chosen, user correct, AI answer, correct answer)] per question."""
+    scored = []
+    for question_id, chosen in zip(question_ids, choices):
+        row = bank.row(question_id)
+        correct = bank.correct[row]
+        scored.append((chosen, chosen == correct, bank.answer(row, ai_model), correct))
+    return scored
+
+
+# Stamps the time the first question was shown, for response times.
+PACK_STAMP_JS = """
+(pack) => {
+    if (!pack) return pack;
+    const p = JSON.parse(pack);
+    p.shown = Date.now();
+    return JSON.stringify(p);
+}
+"""
+
+# Inputs: clicked button label, pack. Outputs: question title, question card, the
+# four buttons, feedback, both score cards, pack, submission. Mirrors the HTML
+# that start_quiz / process_answer render on the server.
+PACK_ANSWER_JS = """
+(label, pack) => {
+    const p = JSON.parse(pack);
+    const n = p.questions.length;
+    if (p.i >= n) throw new Error("quiz already submitted");
+    const letters = ["A", "B", "C", "D"];
+    const esc = (s) => String(s).replace(/[&<>"']/g, (c) => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"})[c]);
+    const card = (id, who, score) => `<div class="score-card" id="${id}">${who}<br><span class="score-value">${score}</span></div>`;
+    const bytes = (b64) => Array.from(atob(b64), (c) => c.charCodeAt(0));
+    const q = p.questions[p.i];
+    const code = bytes(p.codes)[p.i] ^ bytes(p.nonce)[p.i];
+    const correct = code & 3, ai = (code >> 2) - 1;
+    const chosen = q.options.indexOf(label);
+    const now = Date.now();
+    p.choices.push(chosen);
+    p.ms.push(p.shown ? now - p.shown : 0);
+    p.shown = now;
+    if (chosen === correct) p.user += 1;
+    if (ai === correct) p.ai += 1;
+    p.i += 1;
+    const feedback = `Your answer: **${chosen >= 0 ? letters[chosen] : "N/A"}** (${chosen === correct ? "✅ Correct" : "❌ Incorrect"}).\\n`
+        + `AI's answer: **${ai >= 0 ? letters[ai] : "N/A"}** (${ai === correct ? "✅ Correct" : "❌ Incorrect"}).\\n`
+        + `The correct answer was: **${letters[correct]}**.`;
+    const next = p.questions[Math.min(p.i, n - 1)];
+    const title = `<div class="progress-container"><div class="progress-bar-fill" style="width: ${(Math.min(p.i, n - 1) + 1) / n * 100}%;"></div>`
+        + `<div class="progress-text">Question ${Math.min(p.i, n - 1) + 1} / ${n}</div></div>`;
+    const submission = p.i >= n ? JSON.stringify({choices: p.choices, ms: p.ms}) : "";
+    return [title, `<div id="question-card"><span>${esc(next.text)}</span></div>`, ...next.options, feedback,
+            card("user-score-card", "Human", p.user), card("ai-score-card", "AI", p.ai), JSON.stringify(p), submission];
+}
+"""
@@ -0,0 +1,73 @@
+"""Pre-rendered HTML fragments for the quiz screens.
+
+Question cards are rendered (and HTML-escaped) once per bank, when the bank is
+published (an appended bank renders only its new rows); progress bars, score cards and answer feedback come from small
+caches, since there are only a few dozen distinct ones. Handlers just pick
+fragments. Option labels go into Gradio buttons as plain text and need no
+rendering. The pack-mode JavaScript in quiz_pack renders the same markup.
+"""
+import html
+import threading
+import weakref
+from functools import lru_cache
+
+from question_bank import NO_ANSWER
+
+CHOICES = ("A", "B", "C", "D")
+SCORE_CARDS = {'user': ('user-score-card', 'Human'), 'ai': ('ai-score-card', 'AI')}
+
+_cards_by_bank = weakref.WeakKeyDictionary()
+_cards_lock = threading.Lock()
+
+
+def question_cards(bank, previous=None):
+    """Question card HTML for every row of ``bank``, rendered on first use and kept while the bank lives.
+
+    ``previous`` is the bank ``bank`` was extended from, if any: its cards are
+    reused for the shared rows, so an append renders only the new questions.
+    """
+    cards = _cards_by_bank.get(bank)
+    if cards is None:
+        with _cards_lock:
+            cards = _cards_by_bank.get(bank)
+            if cards is None:
+                question = bank.question
+                reused = _cards_by_bank.get(previous, ()) if previous is not None else ()
+                if len(reused) != bank.extends_rows:
+                    reused = ()
+                cards = _cards_by_bank[bank] = reused + tuple(
+                    f'<div id="question-card"><span>{html.escape(question(row))}</span></div>'
+                    for row in range(len(reused), len(bank)))
+    return cards
+
+
+@lru_cache(maxsize=8)
+def progress_bars(total):
+    """Progress bar HTML for questions 1..total (index 0 is question 1)."""
+    return tuple(f'''
+        <div class="progress-container">
+            <div class="progress-bar-fill" style="width: {position / total * 100}%;"></div>
+            <div class="progress-text">Question {position} / {total}</div>
+        </div>
+    ''' for position in range(1, total + 1))
+
+
+@lru_cache(maxsize=64)
+def score_card(player, score):
+    elem_id, label = SCORE_CARDS[player]
+    return f'<div class="score-card" id="{elem_id}">{label}<br><span class="score-value">{score}</span></div>'
+
+
+@lru_cache(maxsize=128)
+def answer_feedback(user_choice, ai_answer, correct):
+    """Feedback markdown; ``user_choice`` is -1 when the click matched no option."""
+    def verdict(choice):
+        return '✅ Correct' if choice == correct else '❌ Incorrect'
+
+    return (f"Your answer: **{CHOICES[user_choice] if user_choice != -1 else 'N/A'}** ({verdict(user_choice)}).\n"
+            f"AI's answer: **{CHOICES[ai_answer] if ai_answer != NO_ANSWER else 'N/A'}** ({verdict(ai_answer)}).\n"
+            f"The correct answer was: **{CHOICES[correct]}**.")
+
+
+def result_banner(text):
+    return f'<div id="final-result-banner">{html.escape(text)}</div>'
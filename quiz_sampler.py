@@ -0,0 +1,113 @@
+"""Difficulty-calibrated quiz sampler.
+
+For each model the bank already records which option it picked; comparing that
+with ``cop`` gives a correctness mask. A quiz is drawn by first choosing the AI's
+score inside the tier's promised band and then picking exactly that many
+questions the model answers correctly (and the rest from those it misses), so
+every draw lands in the band without rejection sampling.
+"""
+import threading
+
+import numpy as np
+
+from question_bank import UNKNOWN_CATEGORY
+
+# AI score band (inclusive, out of 10 questions) per tier, from the T&C table.
+TIER_SCORE_BANDS = {
+    'gpt-5': (8, 10),         # Hard
+    'gpt-4.1': (7, 8),        # Medium
+    'gpt-4.1-nano': (5, 7),   # Easy
+}
+BAND_QUESTIONS = 10
+
+
+class QuizSampler:
+    def __init__(self, bank, seed=None):
+        self.bank = bank
+        # numpy Generators are not thread-safe. A lock around one shared Generator made concurrent draws queue
+        # behind whichever thread lost the GIL while holding it, so each thread gets its own stream instead.
+        self._seeds = np.random.SeedSequence(seed)
+        self._seeds_lock = threading.Lock()
+        self._local = threading.local()
+        self._all_rows = np.arange(len(bank))
+        correct = np.frombuffer(bank.correct, dtype=np.int8)
+        subject_column = bank.categories['subject_name']
+        subjects = np.frombuffer(subject_column.codes, dtype=np.uint32).astype(np.int64)
+        if UNKNOWN_CATEGORY in subject_column.names:  # rows without a subject share no stratum
+            subjects[subjects == subject_column.names.index(UNKNOWN_CATEGORY)] = -1
+        self.correct_masks = {model: np.frombuffer(answers, dtype=np.int8) == correct
+                              for model, answers in bank.model_answers.items()}
+        # model -> (rows it gets right, rows it gets wrong)
+        self._pools = {model: (_Pool(np.flatnonzero(mask), subjects), _Pool(np.flatnonzero(~mask), subjects))
+                       for model, mask in self.correct_masks.items()}
+
+    def score_band(self, ai_model, n):
+        band = TIER_SCORE_BANDS.get(ai_model)
+        if band is None or ai_model not in self._pools:
+            return None
+        lo, hi = (round(b * n / BAND_QUESTIONS) for b in band)
+        right, wrong = (len(pool.rows) for pool in self._pools[ai_model])
+        # Clamp to what the bank can actually supply for this model.
+        lo = min(max(lo, n - wrong), right)
+        hi = max(min(hi, right), lo)
+        return lo, hi
+
+    def draw(self, ai_model, n=10, balance_subjects=False):
+        """Return up to ``n`` distinct bank rows with the AI's score inside its tier band."""
+        n = min(n, len(self._all_rows))
+        band = self.score_band(ai_model, n)
+        rng = self._rng()
+        if band is None:
+            return rng.choice(self._all_rows, n, replace=False).tolist()
+        ai_score = int(rng.integers(band[0], band[1] + 1))
+        right, wrong = self._pools[ai_model]
+        rows = np.concatenate((right.pick(rng, ai_score, balance_subjects),
+                               wrong.pick(rng, n - ai_score, balance_subjects)))
+        rng.shuffle(rows)
+        return rows.tolist()
+
+    def _rng(self):
+        rng = getattr(self._local, 'rng', None)
+        if rng is None:
+            with self._seeds_lock:  # once per thread
+                seed, = self._seeds.spawn(1)
+            rng = self._local.rng = np.random.default_rng(seed)
+        return rng
+
+    def ai_score(self, ai_model, rows):
+        mask = self.correct_masks.get(ai_model)
+        return int(mask[rows].sum()) if mask is not None else None
+
+
+class _Pool:
+    """Bank rows and their subjects (-1: none), for picks that spread over subjects."""
+
+    def __init__(self, rows, subjects):
+        self.rows = rows
+        self._subjects = subjects[rows]
+        self._n_subjects = len(np.unique(self._subjects[self._subjects >= 0]))
+
+    def pick(self, rng, k, balance_subjects=False):
+        if k <= 0:
+            return self.rows[:0]
+        if not balance_subjects or not self._n_subjects:
+            return rng.choice(self.rows, k, replace=False)
+        # Uniform order, skipping rows whose subject already has its share of the k slots. Every row keeps
+        # close to uniform exposure (small subjects are not favoured), yet no subject fills the quiz.
+        cap = -(-k // self._n_subjects)
+        size = len(self.rows)
+        candidates = rng.choice(size, min(size, 4 * k), replace=False)
+        picked, taken = [], {}
+        for batch in (candidates, None):
+            if batch is None:  # rare: the first candidates were too concentrated, so go through the rest
+                batch = rng.permutation(np.setdiff1d(np.arange(size), candidates, assume_unique=True))
+            for i in batch:
+                subject = self._subjects[i]
+                if subject < 0 or taken.get(subject, 0) < cap:
+                    picked.append(i)
+                    taken[subject] = taken.get(subject, 0) + 1
+                    if len(picked) == k:
+                        return self.rows[picked]
+        # Small subjects can't fill their share: lift the cap for the remainder.
+        rest = rng.choice(np.setdiff1d(np.arange(size), picked), k - len(picked), replace=False)
+        return self.rows[np.concatenate((np.array(picked, dtype=np.intp), rest))]
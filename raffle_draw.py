@@ -0,0 +1,135 @@
+"""Raffle draw over quiz_results.csv, following the T&C prize rules.
+
+* A result qualifies when the participant at least draws with the AI
+  (UserScore >= AIScore).
+* Entries depend on the tier played: Hard (gpt-5) 3, Medium (gpt-4.1) 2,
+  Easy (gpt-4.1-nano) 1. A participant's entries are those of their best
+  qualifying result; replays do not add up.
+* Participants are identified by normalized email and win at most one prize.
+
+Result files are streamed row by row, so memory grows with the number of
+distinct participants, not with the number of rows. The draw is a weighted
+sample without replacement (Efraimidis-Spirakis): each participant gets the key
+ln(u) / entries, with u derived from a hash of the seed and their email, and
+the largest keys win. This makes the result independent of row order and
+reproducible from the seed alone.
+
+    python raffle_draw.py quiz_results.csv --seed "HCW-2025-final" --out winners.csv
+"""
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import math
+import os
+from datetime import datetime
+
+PRIZE_COUNT = 20
+# Raffle entries earned per AI tier when the participant draws or wins.
+RAFFLE_ENTRIES = {'gpt-5': 3, 'gpt-4.1': 2, 'gpt-4.1-nano': 1}
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def raffle_entries(user_score, ai_score, ai_model):
+    return RAFFLE_ENTRIES.get(ai_model, 0) if user_score >= ai_score else 0
+
+
+class Participant:
+    __slots__ = ('email', 'name', 'company', 'entries', 'plays', 'best_result')
+
+    def __init__(self, email, name, company):
+        self.email = email
+        self.name = name
+        self.company = company
+        self.entries = 0
+        self.plays = 0
+        self.best_result = ''
+
+
+def collect_participants(paths):
+    """Stream result files and return (participants by email, audit counters)."""
+    participants = {}
+    audit = {'files': [], 'rows': 0, 'skipped_rows': 0, 'qualifying_rows': 0}
+    for path in paths:
+        digest, rows = hashlib.sha256(), 0
+        with open(path, 'rb') as raw:
+            for chunk in iter(lambda: raw.read(1 << 20), b''):
+                digest.update(chunk)
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                rows += 1
+                email = normalize_email(row.get('Email'))
+                try:
+                    user_score, ai_score = int(row['UserScore']), int(row['AIScore'])
+                except (KeyError, TypeError, ValueError):
+                    audit['skipped_rows'] += 1
+                    continue
+                if not email:
+                    audit['skipped_rows'] += 1
+                    continue
+                person = participants.get(email)
+                if person is None:
+                    person = participants[email] = Participant(email, (row.get('Name') or '').strip(),
+                                                               (row.get('Company') or '').strip())
+                person.plays += 1
+                entries = raffle_entries(user_score, ai_score, row.get('AIModel'))
+                if entries:
+                    audit['qualifying_rows'] += 1
+                if entries > person.entries:
+                    person.entries = entries
+                    person.best_result = f"{row.get('Timestamp', '')} {user_score}-{ai_score} {row.get('AIModel')}"
+        audit['files'].append({'path': os.path.abspath(path), 'sha256': digest.hexdigest(), 'rows': rows})
+        audit['rows'] += rows
+    return participants, audit
+
+
+def draw_key(seed, email, entries):
+    digest = hashlib.sha256(f"{seed}\0{email}".encode('utf-8')).digest()
+    u = (int.from_bytes(digest[:8], 'big') + 0.5) / 2**64  # uniform in (0, 1)
+    return math.log(u) / entries
+
+
+def draw_winners(participants, seed, prizes=PRIZE_COUNT):
+    eligible = (p for p in participants.values() if p.entries)
+    keyed = ((draw_key(seed, p.email, p.entries), p.email, p) for p in eligible)
+    return [(key, p) for key, _, p in heapq.nlargest(prizes, keyed)]
+
+
+def write_winners(path, winners, seed, participants, audit):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Rank', 'Name', 'Email', 'Company', 'Entries', 'BestResult', 'Plays', 'DrawKey'])
+        for rank, (key, p) in enumerate(winners, 1):
+            writer.writerow([rank, p.name, p.email, p.company, p.entries, p.best_result, p.plays, f"{key:.12f}"])
+    audit = dict(audit, seed=seed, drawn_at=datetime.now().isoformat(timespec='seconds'),
+                 participants=len(participants),
+                 eligible_participants=sum(1 for p in participants.values() if p.entries),
+                 total_entries=sum(p.entries for p in participants.values()),
+                 entries_per_tier=RAFFLE_ENTRIES, winners=len(winners))
+    with open(os.path.splitext(path)[0] + '.audit.json', 'w', encoding='utf-8') as f:
+        json.dump(audit, f, indent=2)
+        f.write('\n')
+    return audit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('results', nargs='+', help='one or more quiz_results.csv files (e.g. one per event day)')
+    parser.add_argument('--seed', required=True, help='public seed; the same seed and files always give the same winners')
+    parser.add_argument('--prizes', type=int, default=PRIZE_COUNT)
+    parser.add_argument('--out', default='winners.csv')
+    args = parser.parse_args()
+
+    participants, audit = collect_participants(args.results)
+    winners = draw_winners(participants, args.seed, args.prizes)
+    audit = write_winners(args.out, winners, args.seed, participants, audit)
+    print(f"{audit['rows']} rows, {audit['participants']} participants, {audit['eligible_participants']} eligible "
+          f"({audit['total_entries']} entries); {len(winners)} winners written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Background, batched writers for quiz results.
+
+Handlers call ``submit`` and return immediately; a single writer thread drains
+the queue and appends records in batches (by size or on a timer), so no file
+I/O happens on the request path and concurrent sessions never interleave rows.
+A failed write is retried on the next flush (up to ``max_pending`` records); a
+record the writer rejects outright is dropped on its own, not with its batch.
+"""
+import csv
+import io
+import os
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process writes only
+    fcntl = None
+
+RESULTS_COLUMNS = ['Timestamp', 'Name', 'Email', 'Company', 'JobTitle', 'UserScore', 'AIScore', 'AIModel']
+
+_STOP = object()
+
+
+class BatchSink:
+    """Queue + writer thread. Subclasses implement ``_write_batch(records)``."""
+
+    def __init__(self, batch_size=64, flush_interval=1.0, max_queue=10000, max_pending=None, name="batch-sink"):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending if max_pending is not None else max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = []  # records from a failed flush, retried on the next one
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._records_written = 0
+        self._batches_flushed = 0
+        self._flush_errors = 0
+        self._records_dropped = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        if self._closed:
+            raise RuntimeError("sink is closed")
+        self._queue.put(record)  # only blocks if the writer is max_queue records behind
+
+    def flush(self, timeout=None):
+        """Block until every record submitted before this call has been written."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            batches = self._batches_flushed
+            return {
+                'queue_depth': self._queue.qsize(),
+                'pending_retry': len(self._pending),
+                'records_written': self._records_written,
+                'batches_flushed': batches,
+                'flush_errors': self._flush_errors,
+                'records_dropped': self._records_dropped,
+                'last_flush_ms': round(self._last_flush_ms, 3),
+                'max_flush_ms': round(self._max_flush_ms, 3),
+                'avg_flush_ms': round(self._total_flush_ms / batches, 3) if batches else 0.0,
+            }
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+    def _flush(self, batch):
+        records = self._pending + batch
+        start = time.perf_counter()
+        try:
+            self._write_batch(records)
+        except OSError as e:  # the target is unavailable (disk full, lock timeout): retry the batch later
+            self._flush_failed(records, e)
+            self._keep_pending(records)
+            return
+        except Exception as e:  # a record the writer can't handle: write the rest one by one, drop that one
+            self._flush_failed(records, e)
+            self._pending = []
+            self._write_each(records)
+            return
+        self._pending = []
+        self._flushed(len(records), (time.perf_counter() - start) * 1000)
+
+    def _write_each(self, records):
+        for i, record in enumerate(records):
+            start = time.perf_counter()
+            try:
+                self._write_batch([record])
+            except OSError as e:
+                self._flush_failed(records[i:], e)
+                self._keep_pending(records[i:])
+                return
+            except Exception as e:
+                print(f"Dropping record from {self._thread.name}: {e!r}: {record!r}")
+                with self._stats_lock:
+                    self._records_dropped += 1
+                continue
+            self._flushed(1, (time.perf_counter() - start) * 1000)
+
+    def _keep_pending(self, records):
+        overflow = len(records) - self.max_pending
+        if overflow > 0:  # storage has been failing for a while: drop the oldest rather than grow without bound
+            print(f"Dropping {overflow} records from {self._thread.name}: retry backlog is full")
+            with self._stats_lock:
+                self._records_dropped += overflow
+            records = records[overflow:]
+        self._pending = records
+
+    def _flush_failed(self, records, error):
+        print(f"Error flushing {len(records)} records from {self._thread.name}: {error!r}")
+        with self._stats_lock:
+            self._flush_errors += 1
+
+    def _flushed(self, count, elapsed_ms):
+        with self._stats_lock:
+            self._records_written += count
+            self._batches_flushed += 1
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            try:
+                if batch or (self._pending and (waiters or stop)):
+                    self._flush(batch)
+            except Exception as e:  # never let a bug in flushing kill the writer; the batch is lost
+                print(f"Error in {self._thread.name}: {e!r}")
+                with self._stats_lock:
+                    self._flush_errors += 1
+                    self._records_dropped += len(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+
+class CsvResultsSink(BatchSink):
+    """Appends result rows to a CSV under an exclusive file lock.
+
+    The header is written by whichever writer finds the file empty while holding
+    the lock, so several processes can share one results file safely.
+    """
+
+    def __init__(self, path, columns=RESULTS_COLUMNS, **kwargs):
+        self.path = path
+        self.columns = list(columns)
+        super().__init__(name="results-sink", **kwargs)
+
+    def _write_batch(self, records):
+        rows = io.StringIO(newline='')
+        csv.writer(rows).writerows(records)  # format first, so a bad record leaves no partial batch in the file
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if f.seek(0, os.SEEK_END) == 0:
+                    csv.writer(f).writerow(self.columns)
+                f.write(rows.getvalue())
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,163 @@
+"""Run the quiz as several worker processes behind one local port.
+
+The parent builds the binary question bank cache once, then starts N copies of
+demo_merchandise.py on consecutive private ports. Each worker memory-maps the
+same ``.qbank`` file, so the bank's pages are shared through the page cache
+instead of being parsed into every process. Sessions and the participant
+registry go to SQLite files (WAL), results and answer telemetry to shared files
+appended under ``flock``, and every worker's leaderboard tails the results file.
+
+A small reverse proxy on --port forwards each request to a worker. Gradio keeps
+per-session state (``gr.State``, the event queue) inside the worker that served
+it, so requests carrying a ``session_hash`` always go to the same worker;
+everything else (the page, config, assets) is spread round-robin. Responses are
+streamed, so the queue's server-sent events pass straight through.
+
+    python serve_workers.py --workers 4 --port 7860
+    QUIZ_CONCURRENCY_PROCESS_ANSWER=16 python serve_workers.py --workers 8
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import zlib
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from question_bank import load_bank
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(HERE, "demo_merchandise.py")
+DEFAULT_BANK_PATH = "/home/bigdata/health_care_week/test_bank_200.jsonl"
+# Hop-by-hop headers are per connection and must not be forwarded.
+HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer',
+               'transfer-encoding', 'upgrade', 'content-length'}
+MAX_ROUTING_BODY = 64 * 1024  # only small JSON bodies (e.g. queue/join) are inspected for a session_hash
+
+
+def session_hash(request, body):
+    """The Gradio session a request belongs to, if it says."""
+    value = request.query_params.get('session_hash')
+    if value:
+        return value
+    parts = request.url.path.rstrip('/').split('/')
+    if 'heartbeat' in parts[:-1]:
+        return parts[-1]
+    if body and len(body) <= MAX_ROUTING_BODY and request.headers.get('content-type', '').startswith('application/json'):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None
+        if isinstance(data, dict) and isinstance(data.get('session_hash'), str):
+            return data['session_hash']
+    return None
+
+
+def proxy_app(worker_urls):
+    client = httpx.AsyncClient(timeout=httpx.Timeout(None, connect=5.0),
+                               limits=httpx.Limits(max_connections=None, max_keepalive_connections=200))
+    round_robin = itertools.cycle(range(len(worker_urls)))
+
+    async def forward(request):
+        body = await request.body()
+        key = session_hash(request, body)
+        worker = zlib.crc32(key.encode('utf-8')) % len(worker_urls) if key else next(round_robin)
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS]
+        headers.append(('x-forwarded-for', request.client.host if request.client else ''))
+        url = worker_urls[worker] + request.url.path + (f"?{request.url.query}" if request.url.query else "")
+        upstream = client.build_request(request.method, url, headers=headers, content=body)
+        try:
+            response = await client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            return PlainTextResponse(f"worker {worker} unavailable: {e}", status_code=502)
+        streamed = StreamingResponse(response.aiter_raw(), status_code=response.status_code,
+                                     background=BackgroundTask(response.aclose))
+        streamed.raw_headers = [(k.encode('latin-1'), v.encode('latin-1')) for k, v in response.headers.multi_items()
+                                if k.lower() not in HOP_HEADERS]  # keeps repeated headers such as Set-Cookie
+        return streamed
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await client.aclose()
+
+    methods = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS']
+    return Starlette(routes=[Route('/{path:path}', forward, methods=methods)], lifespan=lifespan)
+
+
+def start_workers(count, base_port, env):
+    workers = []
+    metrics_port = int(env.get("QUIZ_METRICS_PORT", "9464"))  # same default as the app; 0 disables
+    for i in range(count):
+        worker_env = dict(env, GRADIO_SERVER_NAME="127.0.0.1", GRADIO_SERVER_PORT=str(base_port + i),
+                          QUIZ_METRICS_PORT=str(metrics_port + i if metrics_port else 0))
+        workers.append(subprocess.Popen([sys.executable, APP_SCRIPT], cwd=HERE, env=worker_env))
+    return workers
+
+
+def wait_ready(urls, workers, timeout):
+    deadline = time.monotonic() + timeout
+    for url, worker in zip(urls, workers):
+        while True:
+            if worker.poll() is not None:
+                raise RuntimeError(f"worker for {url} exited with code {worker.returncode}")
+            try:
+                urllib.request.urlopen(url + "/config", timeout=1).close()
+                break
+            except (urllib.error.URLError, OSError):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"worker for {url} did not start within {timeout}s")
+                time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--worker-port", type=int, default=7900, help="first private worker port")
+    parser.add_argument("--sessions-db", default="quiz_sessions.db")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    bank_path = os.environ.get("QUIZ_FILE_PATH", DEFAULT_BANK_PATH)
+    start = time.perf_counter()
+    bank = load_bank(bank_path)  # builds <bank>.qbank once; workers only map it
+    print(f"Question bank: {len(bank)} questions cached in {time.perf_counter() - start:.2f}s.")
+    del bank
+
+    env = dict(os.environ, QUIZ_FILE_PATH=os.path.abspath(bank_path), QUIZ_WORKER_MODE="1", QUIZ_SHARE="0",
+               QUIZ_SESSIONS_PATH=os.path.abspath(args.sessions_db),
+               QUIZ_RESULTS_PATH=os.path.abspath(os.environ.get("QUIZ_RESULTS_PATH", "quiz_results.csv")),
+               QUIZ_ANSWERS_PATH=os.path.abspath(os.environ.get("QUIZ_ANSWERS_PATH", "quiz_answers.bin")),
+               QUIZ_REGISTRY_PATH=os.path.abspath(os.environ.get("QUIZ_REGISTRY_PATH", "quiz_participants.db")))
+    urls = [f"http://127.0.0.1:{args.worker_port + i}" for i in range(args.workers)]
+    workers = start_workers(args.workers, args.worker_port, env)
+    try:
+        wait_ready(urls, workers, args.startup_timeout)
+        print(f"{args.workers} workers ready; serving on http://{args.host}:{args.port}")
+        uvicorn.run(proxy_app(urls), host=args.host, port=args.port, log_level="warning")
+    finally:
+        for worker in workers:
+            worker.send_signal(signal.SIGINT)  # shuts Gradio down cleanly, so atexit flushes results and answers
+        for worker in workers:
+            try:
+                worker.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+
+
+if __name__ == "__main__":
+    main()
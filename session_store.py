@@ -0,0 +1,195 @@
+"""Server-side quiz sessions keyed by a short token.
+
+The browser only holds the token in a ``gr.State``; the session keeps question
+ids, progress and scores. Idle sessions expire after ``ttl`` seconds and the
+least recently used ones are evicted once ``max_sessions`` is reached.
+
+``SessionStore`` keeps sessions in process memory. ``SqliteSessionStore`` keeps
+them in a SQLite file (WAL mode) shared by several worker processes. Handlers
+record progress with ``advance``, which only succeeds if the session is still at
+the question they answered, so a double click can't score the same question twice.
+A finished session (``q_index`` past the last question) is kept until the player
+resets or it expires, so late clicks on it can be ignored rather than reported
+as an expired session.
+"""
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class QuizSession:
+    __slots__ = ('bank', 'question_ids', 'q_index', 'user_score', 'ai_score',
+                 'name', 'email', 'company', 'job_title', 'ai_model', 'last_seen', 'shown_at')
+
+    def __init__(self, bank, question_ids, name, email, company, job_title, ai_model):
+        self.bank = bank  # the bank snapshot this quiz was drawn from
+        self.question_ids = tuple(question_ids)
+        self.q_index = 0
+        self.user_score = 0
+        self.ai_score = 0
+        self.name = name
+        self.email = email
+        self.company = company
+        self.job_title = job_title
+        self.ai_model = ai_model
+        self.last_seen = time.monotonic()
+        self.shown_at = self.last_seen  # when the current question was sent out
+
+
+class SessionStore:
+    clock = staticmethod(time.monotonic)  # the time base of last_seen and shown_at
+
+    def __init__(self, ttl=1800, max_sessions=10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # token -> QuizSession, least recently used first
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def create(self, bank, question_ids, name, email, company, job_title, ai_model):
+        session = QuizSession(bank, question_ids, name, email, company, job_title, ai_model)
+        token = secrets.token_urlsafe(12)
+        with self._lock:
+            self._evict_expired(session.last_seen)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            self._sessions[token] = session
+        return token
+
+    def get(self, token):
+        """Return the live session for ``token`` (refreshing its TTL) or None."""
+        if not token:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(token)
+            if session is not None:
+                session.last_seen = now
+                self._sessions.move_to_end(token)
+            return session
+
+    def advance(self, token, session, from_q_index, q_index, user_score, ai_score, shown_at):
+        """Move the session from question ``from_q_index`` to ``q_index``; False if it is no longer there."""
+        with self._lock:
+            if session.q_index != from_q_index or self._sessions.get(token) is not session:
+                return False  # a stale click: another request already answered this question
+            session.q_index, session.user_score, session.ai_score, session.shown_at = q_index, user_score, ai_score, shown_at
+            return True
+
+    def discard(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict_expired(self, now):
+        # Entries are kept in access order, so expired ones are always at the front.
+        cutoff = now - self.ttl
+        while self._sessions:
+            token, session = next(iter(self._sessions.items()))
+            if session.last_seen > cutoff:
+                break
+            del self._sessions[token]
+            self.evicted += 1
+
+
+class SqliteSessionStore:
+    """Sessions in a SQLite table, safe to share between processes on one machine.
+
+    Only ids, progress and scores are stored; ``get`` attaches the calling
+    process's current bank (``bank_provider()``). A session whose questions are
+    no longer in that bank (the bank file was replaced mid-quiz) counts as expired.
+    Timestamps are wall-clock (``time.time``): the file outlives reboots, and
+    ``time.monotonic`` restarts with the machine, which would leave old rows
+    looking newer than live ones.
+    """
+
+    clock = staticmethod(time.time)
+
+    COLUMNS = ('question_ids', 'q_index', 'user_score', 'ai_score', 'name', 'email', 'company',
+               'job_title', 'ai_model', 'last_seen', 'shown_at')
+
+    def __init__(self, path, bank_provider, ttl=1800, max_sessions=10000):
+        self.path = path
+        self.bank_provider = bank_provider
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.evicted = 0
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute(f"CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, {', '.join(self.COLUMNS)})")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")  # sessions are short-lived; durability per commit isn't needed
+        return db
+
+    def create(self, bank, question_ids, name, email, company, job_title, ai_model):
+        session = QuizSession(bank, question_ids, name, email, company, job_title, ai_model)
+        session.last_seen = session.shown_at = self.clock()
+        token = secrets.token_urlsafe(12)
+        db = self._connection()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            evicted = db.execute("DELETE FROM sessions WHERE last_seen <= ?", (session.last_seen - self.ttl,)).rowcount
+            excess = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions + 1
+            if excess > 0:
+                evicted += db.execute("DELETE FROM sessions WHERE token IN "
+                                      "(SELECT token FROM sessions ORDER BY last_seen LIMIT ?)", (excess,)).rowcount
+            db.execute(f"INSERT INTO sessions VALUES (?, {', '.join('?' * len(self.COLUMNS))})",
+                       (token,) + self._values(session))
+        self.evicted += evicted
+        return token
+
+    def get(self, token):
+        """Return the live session for ``token`` (refreshing its TTL) or None."""
+        if not token:
+            return None
+        now = self.clock()
+        db = self._connection()
+        rows = db.execute(f"UPDATE sessions SET last_seen = ? WHERE token = ? AND last_seen > ? "
+                          f"RETURNING {', '.join(self.COLUMNS)}", (now, token, now - self.ttl)).fetchall()
+        if not rows:
+            return None
+        row = rows[0]
+        bank = self.bank_provider()
+        question_ids = row[0].split('\n')
+        if not all(qid in bank for qid in question_ids):
+            self.discard(token)
+            return None
+        session = QuizSession(bank, question_ids, *row[4:9])
+        session.q_index, session.user_score, session.ai_score = row[1:4]
+        session.last_seen, session.shown_at = row[9:11]
+        return session
+
+    def advance(self, token, session, from_q_index, q_index, user_score, ai_score, shown_at):
+        """Move the session from question ``from_q_index`` to ``q_index``; False if it is no longer there."""
+        updated = self._connection().execute(
+            "UPDATE sessions SET q_index = ?, user_score = ?, ai_score = ?, shown_at = ? WHERE token = ? AND q_index = ?",
+            (q_index, user_score, ai_score, shown_at, token, from_q_index)).rowcount
+        if not updated:
+            return False  # a stale click, possibly served by another worker
+        session.q_index, session.user_score, session.ai_score, session.shown_at = q_index, user_score, ai_score, shown_at
+        return True
+
+    def discard(self, token):
+        self._connection().execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    @staticmethod
+    def _values(session):
+        return ('\n'.join(session.question_ids), session.q_index, session.user_score, session.ai_score,
+                session.name, session.email, session.company, session.job_title, session.ai_model,
+                session.last_seen, session.shown_at)
@@ -0,0 +1,151 @@
+"""Static image assets served by URL with long-lived cache headers.
+
+Each source image is resized/recompressed once (the smallest of WebP, the
+resized image in its own format and the original, via Pillow when available,
+otherwise the original bytes) into a content-addressed variant cached on disk;
+variants of an earlier source are removed. Variant URLs embed the content hash,
+so responses are marked immutable and the browser only ever re-downloads an
+image when its content changes.
+"""
+import hashlib
+import io
+import os
+
+from starlette.responses import Response
+from starlette.routing import Route
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ASSET_ROUTE = "/quiz-static"  # not /assets: that prefix belongs to Gradio's own JS/CSS bundle
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+MEDIA_TYPES = {".webp": "image/webp", ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+VARIANT_QUALITY = 82
+VARIANT_VERSION = 2  # part of the variant hash: bump when _build chooses differently, so old variants are rebuilt
+
+
+class Asset:
+    __slots__ = ('filename', 'data', 'etag', 'media_type', 'width', 'height')
+
+    def __init__(self, filename, data, media_type, width=None, height=None):
+        self.filename = filename
+        self.data = data
+        self.etag = f'"{filename}"'  # filename already carries the content hash
+        self.media_type = media_type
+        self.width = width
+        self.height = height
+
+    @property
+    def url(self):
+        return f"{ASSET_ROUTE}/{self.filename}"
+
+    def img_tag(self, elem_id, alt):
+        size = f' width="{self.width}" height="{self.height}"' if self.width else ''
+        return f'<img id="{elem_id}" src="{self.url}" alt="{alt}"{size}>'
+
+
+class AssetStore:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._by_filename = {}
+
+    def add(self, name, source_path, max_width=None):
+        """Register ``source_path`` under ``name``; returns the Asset, or None if the file is missing."""
+        try:
+            with open(source_path, "rb") as f:
+                source = f.read()
+        except FileNotFoundError:
+            print(f"Warning: Image not found at {source_path}.")
+            return None
+        digest = hashlib.sha256(source + f"|{max_width}|{VARIANT_QUALITY}|{VARIANT_VERSION}".encode()).hexdigest()[:12]
+        asset = self._load_cached(name, digest) or self._build(name, digest, source, source_path, max_width)
+        self._by_filename[asset.filename] = asset
+        self._prune(name, asset.filename)
+        return asset
+
+    def _load_cached(self, name, digest):
+        if not os.path.isdir(self.cache_dir):
+            return None
+        prefix = f"{name}.{digest}"
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(prefix + ".") and not filename.endswith(".tmp"):
+                with open(os.path.join(self.cache_dir, filename), "rb") as f:
+                    data = f.read()
+                width, height = _image_size(data)
+                ext = os.path.splitext(filename)[1]
+                return Asset(filename, data, MEDIA_TYPES.get(ext, "application/octet-stream"), width, height)
+        return None
+
+    def _build(self, name, digest, source, source_path, max_width):
+        ext = os.path.splitext(source_path)[1].lower()
+        data, width, height = source, None, None
+        if Image is not None:
+            with Image.open(io.BytesIO(source)) as image:
+                source_format = image.format
+                width, height = image.size
+                candidates = []  # (data, ext, size); the smallest is served, with its own dimensions
+                if max_width and image.width > max_width:
+                    image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+                    if source_format in ("PNG", "JPEG"):
+                        candidates.append((_encode(image, source_format), ext, image.size))
+                candidates.append((_encode(image, "WEBP"), ".webp", image.size))
+                for candidate, candidate_ext, size in candidates:
+                    if len(candidate) < len(data):
+                        data, ext, (width, height) = candidate, candidate_ext, size
+        asset = Asset(f"{name}.{digest}{ext}", data, MEDIA_TYPES.get(ext, "application/octet-stream"), width, height)
+        path = os.path.join(self.cache_dir, asset.filename)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # other workers never read a half-written variant
+        except OSError as e:
+            print(f"Warning: could not cache asset {asset.filename}: {e}")
+        return asset
+
+    def _prune(self, name, keep):
+        """Remove ``name``'s cached variants other than ``keep`` (left by an earlier source or settings)."""
+        try:
+            filenames = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for filename in filenames:
+            if filename.startswith(name + ".") and filename != keep and not filename.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except OSError:  # already removed by another worker, or a read-only cache
+                    pass
+
+    async def _serve(self, request):
+        asset = self._by_filename.get(request.path_params["filename"])
+        if asset is None:
+            return Response(status_code=404)
+        headers = {"Cache-Control": CACHE_CONTROL, "ETag": asset.etag}
+        if asset.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(asset.data, media_type=asset.media_type, headers=headers)
+
+    def routes(self):
+        """Starlette routes to hand to the Gradio app, e.g. ``launch(app_kwargs={"routes": ...})``."""
+        return [Route(ASSET_ROUTE + "/{filename}", self._serve, methods=["GET", "HEAD"])]
+
+
+def _encode(image, image_format):
+    out = io.BytesIO()
+    if image_format == "WEBP":
+        image.save(out, format="WEBP", quality=VARIANT_QUALITY, method=6)
+    elif image_format == "JPEG":
+        image.save(out, format="JPEG", quality=VARIANT_QUALITY, optimize=True)
+    else:
+        image.save(out, format=image_format, optimize=True)
+    return out.getvalue()
+
+
+def _image_size(data):
+    if Image is None:
+        return None, None
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size